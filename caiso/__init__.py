@@ -0,0 +1,3 @@
+#   CAISO system-wide demand, supply and emissions data pipeline
+#   Nothing is imported here, so `python -m caiso status` only loads the standard library; see caiso/cli.py
+__version__ = '3.2.2'
@@ -0,0 +1,5 @@
+import sys
+
+from caiso.cli import main
+
+sys.exit(main())
@@ -0,0 +1,101 @@
+#   Command line for the CAISO data pipeline: $ python -m caiso <command>
+#   Only the standard library is imported up front; each command loads what it needs, so health checks and queries start quickly
+import argparse
+from datetime import datetime
+from pathlib import Path
+import sys
+
+def parseDate(text): #command line dates are MM/DD/YYYY, as in the rest of the pipeline
+    return datetime.strptime(text, '%m/%d/%Y')
+
+def pipeline(args): #load the pipeline (pandas, numpy, pyarrow) and apply the options shared by the commands that use it
+    from caiso import operations
+    operations.storeFormat = args.format
+    if getattr(args, 'show_browser', False):
+        operations.headless = False
+    if getattr(args, 'profile', None):
+        operations.profileMode = args.profile
+    return operations
+
+def status(args): #progress from the ledger alone, without loading the pipeline; exits with 2 if the data is older than --max-age days
+    from caiso.ledger import Ledger, ledgerFile
+    if not ledgerFile.exists():
+        print('No ledger in '+str(Path.cwd())+' yet; run `python -m caiso run` first.')
+        return 1
+    ledger = Ledger(ledgerFile)
+    latestDate = ledger.get('latestDate')
+    print('Latest date:      '+(latestDate or 'none'))
+    print('Curtailment:      posted '+(ledger.get('postDate') or 'never')+', data through '+(ledger.get('ct_latestDate') or 'n/a'))
+    output = None
+    for key, dayStatus, days, first, last in ledger.overview():
+        if key!=output:
+            print(key)
+            output = key
+        print('  '+dayStatus.ljust(12)+str(days).rjust(6)+' day(s)  '+first+' to '+last)
+    failures = ledger.failures()
+    if failures:
+        print('Recent failures:')
+        for key, date, attempts, error in failures:
+            print('  '+date+' after '+str(attempts)+' attempt(s): '+str(error))
+    if args.max_age is not None:
+        age = (datetime.now() - parseDate(latestDate)).days if latestDate else None
+        if age is None or age > args.max_age:
+            print('Data is '+(str(age)+' days old' if age is not None else 'missing')+' (limit '+str(args.max_age)+').')
+            return 2
+    return 0
+
+def run(args): #catch the main output up to yesterday
+    pipeline(args).main(args.backend, args.workers, args.pool)
+
+def backfill(args):
+    pipeline(args).runBackfill(args.start, args.end, args.output, args.backend, args.workers, args.pool)
+
+def reprocess(args):
+    pipeline(args).reprocess(args.start, args.end, args.output)
+
+def query(args):
+    df = pipeline(args).query(parseDate(args.start), parseDate(args.end), args.columns.split(',') if args.columns else None, None if args.freq=='5min' else args.freq)
+    df.to_csv(args.csv or sys.stdout, index=False)
+
+def live(args):
+    pipeline(args).live()
+
+def addFetchOptions(parser):
+    parser.add_argument('--backend', choices=['http', 'selenium'], default='http')
+    parser.add_argument('--workers', type=int, default=4, help='number of days fetched at the same time')
+    parser.add_argument('--pool', choices=['thread', 'asyncio'], default='thread')
+    parser.add_argument('--profile', choices=['cpu', 'memory'], help='profile each day with cProfile or tracemalloc into outputs/profiles')
+    parser.add_argument('--show-browser', action='store_true', help='run the selenium backend with visible Chrome windows')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='caiso', description='Compile CAISO system-wide demand, supply, and emissions data')
+    parser.add_argument('--format', choices=['parquet', 'csv', 'mmap'], default='parquet', help='storage format of the output')
+    commands = parser.add_subparsers(dest='command', required=True)
+    p = commands.add_parser('status', help='show ingest progress from the ledger')
+    p.add_argument('--max-age', type=int, metavar='DAYS', help='exit with status 2 if the newest day is more than DAYS days old')
+    p.set_defaults(func=status)
+    p = commands.add_parser('run', help='download every day since the last run')
+    addFetchOptions(p)
+    p.set_defaults(func=run)
+    p = commands.add_parser('backfill', help='download the dates START to END (MM/DD/YYYY) into --output')
+    p.add_argument('start')
+    p.add_argument('end')
+    p.add_argument('--output', help='output to write (defaults to the main output)')
+    addFetchOptions(p)
+    p.set_defaults(func=backfill)
+    p = commands.add_parser('reprocess', help='rebuild the dates START to END (MM/DD/YYYY) of --output from the raw cache')
+    p.add_argument('start')
+    p.add_argument('end')
+    p.add_argument('--output', help='output to write (defaults to the main output)')
+    p.set_defaults(func=reprocess)
+    p = commands.add_parser('query', help='print the data from START to END (MM/DD/YYYY) as CSV')
+    p.add_argument('start')
+    p.add_argument('end')
+    p.add_argument('--freq', choices=['5min', 'hour', 'day', 'month'], default='day', help='the 5-minute data or a rollup (default: day)')
+    p.add_argument('--columns', help='comma-separated columns, e.g. solar_MWh,renewable_share,co2_intensity')
+    p.add_argument('--csv', metavar='PATH', help='write to PATH instead of standard output')
+    p.set_defaults(func=query)
+    p = commands.add_parser('live', help='keep the output current to the latest 5-minute interval until interrupted')
+    p.set_defaults(func=live)
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
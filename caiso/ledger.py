@@ -0,0 +1,225 @@
+#   Ingest ledger shared by the pipeline (caiso.operations) and the command line (caiso.cli)
+#   Standard library only, so reading progress never loads the data stack
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import hashlib
+import json
+import os
+from pathlib import Path
+import socket
+import sqlite3
+import threading
+import time
+
+ledgerFile = Path.cwd() / 'ledger.db' #SQLite ingest ledger: progress state and the status of every day and series
+claimTimeout = 600 #seconds after which a day claimed by a worker that never finished it can be claimed again
+
+def outputKey(outFile): #how an output is identified in the ledger
+    return str(Path(outFile).resolve())
+
+started = time.time() #claims older than this cannot belong to this process, even if an earlier process had the same pid
+
+def workerId():
+    return socket.gethostname()+':'+str(os.getpid())+':'+threading.current_thread().name
+
+def workerGone(worker, claimed): #True if worker ran on this host and its process has exited (a crashed or killed run), so its claims can be taken over at once
+    host, pid = worker.split(':')[:2] if worker and worker.count(':') >= 2 else (None, None)
+    if host!=socket.gethostname() or not pid.isdigit():
+        return False
+    if int(pid)==os.getpid():
+        return claimed is not None and claimed < started
+    if os.name=='nt': #os.kill would terminate the process rather than probe it
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError: #alive, owned by another user
+        return False
+    return False
+
+class Ledger: #ingest progress in SQLite (WAL mode): key/value state plus the status, checksums, row counts and timings of every day and series
+    doneStatuses = ('committed', 'quarantined')
+
+    def __init__(self, path=ledgerFile, mainOutput=None):
+        self.path = str(path)
+        self.mainKey = outputKey(mainOutput) if mainOutput is not None else None #the output whose finished days move the latestDate cursor
+        con = sqlite3.connect(self.path)
+        con.execute('PRAGMA journal_mode=WAL') #readers never block the writer, so workers and other processes can share the ledger
+        con.executescript('''
+            CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS days (output TEXT, date TEXT, status TEXT, worker TEXT, attempts INTEGER DEFAULT 0, claimed REAL, updated REAL,
+                fetch_s REAL, commit_s REAL, rows INTEGER, curtail_pending INTEGER DEFAULT 0, error TEXT, PRIMARY KEY (output, date));
+            CREATE TABLE IF NOT EXISTS series (output TEXT, date TEXT, series TEXT, sha256 TEXT, bytes INTEGER, rows INTEGER, PRIMARY KEY (output, date, series));
+            CREATE TABLE IF NOT EXISTS raw (series TEXT, date TEXT, sha256 TEXT, name TEXT, bytes INTEGER, stored INTEGER, added REAL, accessed REAL, PRIMARY KEY (series, date, sha256));
+        ''')
+        con.close()
+
+    @contextmanager
+    def transaction(self): #BEGIN IMMEDIATE takes the write lock up front, so two workers can never claim or update the same day at once
+        con = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            con.execute('BEGIN IMMEDIATE')
+            yield con
+            con.execute('COMMIT')
+        except BaseException:
+            con.execute('ROLLBACK')
+            raise
+        finally:
+            con.close()
+
+    def get(self, key, default=None):
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            row = con.execute('SELECT value FROM state WHERE key=?', (key,)).fetchone()
+        finally:
+            con.close()
+        return json.loads(row[0]) if row else default
+
+    def set(self, **values):
+        with self.transaction() as con:
+            self._set(con, values)
+
+    def _set(self, con, values):
+        con.executemany('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)', [(k, json.dumps(v)) for k, v in values.items()])
+
+    def claim(self, outFile, day, worker): #mark a day as taken by worker; False if it is already done or being worked on elsewhere
+        key, date, now = outputKey(outFile), datetime.strftime(day, '%Y-%m-%d'), time.time()
+        with self.transaction() as con:
+            row = con.execute('SELECT status, updated, worker, claimed FROM days WHERE output=? AND date=?', (key, date)).fetchone()
+            if row and (row[0] in self.doneStatuses or (row[0] in ('claimed', 'fetched') and now - row[1] < claimTimeout and not workerGone(row[2], row[3]))):
+                return False
+            con.execute('''INSERT INTO days (output, date, status, worker, attempts, claimed, updated) VALUES (?, ?, 'claimed', ?, 1, ?, ?)
+                ON CONFLICT (output, date) DO UPDATE SET status='claimed', worker=excluded.worker, attempts=attempts+1, claimed=excluded.claimed,
+                updated=excluded.updated, error=NULL''', (key, date, worker, now, now))
+            return True
+
+    def holder(self, outFile, day): #(status, worker) of a day, or None if the ledger has no record of it
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            return con.execute('SELECT status, worker FROM days WHERE output=? AND date=?', (outputKey(outFile), datetime.strftime(day, '%Y-%m-%d'))).fetchone()
+        finally:
+            con.close()
+
+    def fetched(self, outFile, day, files, seconds): #record the checksum, size and row count of each downloaded file; files maps each series to its path
+        key, date = outputKey(outFile), datetime.strftime(day, '%Y-%m-%d')
+        rows = []
+        for series, path in files.items():
+            data = Path(path).read_bytes()
+            rows.append((key, date, series, hashlib.sha256(data).hexdigest(), len(data), max(len(data.splitlines()) - 1, 0)))
+        with self.transaction() as con:
+            con.executemany('INSERT OR REPLACE INTO series (output, date, series, sha256, bytes, rows) VALUES (?, ?, ?, ?, ?, ?)', rows)
+            con.execute("UPDATE days SET status='fetched', fetch_s=?, updated=? WHERE output=? AND date=?", (seconds, time.time(), key, date))
+
+    def finish(self, outFile, day, status, rows=None, seconds=None, curtailPending=False, error=None, state=None): #record the outcome of a day, together with any state that changes with it
+        key, date = outputKey(outFile), datetime.strftime(day, '%Y-%m-%d')
+        with self.transaction() as con:
+            con.execute('''INSERT INTO days (output, date, status, rows, commit_s, curtail_pending, error, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (output, date) DO UPDATE SET status=excluded.status, rows=excluded.rows, commit_s=excluded.commit_s,
+                curtail_pending=excluded.curtail_pending, error=excluded.error, updated=excluded.updated''',
+                (key, date, status, rows, seconds, int(curtailPending), error, time.time()))
+            if state:
+                self._set(con, state)
+            if key==self.mainKey and status in self.doneStatuses: #move the main output's cursor past every finished day
+                row = con.execute("SELECT value FROM state WHERE key='latestDate'").fetchone()
+                latest = json.loads(row[0]) if row else None
+                if latest:
+                    nextDay = datetime.strptime(latest, '%m/%d/%Y') + timedelta(days=1)
+                    while con.execute('SELECT 1 FROM days WHERE output=? AND date=? AND status IN (?, ?)', (key, datetime.strftime(nextDay, '%Y-%m-%d'))+self.doneStatuses).fetchone():
+                        latest = datetime.strftime(nextDay, '%m/%d/%Y')
+                        nextDay += timedelta(days=1)
+                    self._set(con, {'latestDate': latest})
+
+    def done(self, outFile, startDate, endDate): #dates (YYYY-MM-DD) between startDate and endDate that are already committed or quarantined
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            rows = con.execute('SELECT date FROM days WHERE output=? AND date BETWEEN ? AND ? AND status IN (?, ?)',
+                (outputKey(outFile), datetime.strftime(startDate, '%Y-%m-%d'), datetime.strftime(endDate, '%Y-%m-%d'))+self.doneStatuses).fetchall()
+        finally:
+            con.close()
+        return {r[0] for r in rows}
+
+    def lastCommitted(self, outFile): #newest committed date (YYYY-MM-DD) of outFile, or None
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            return con.execute("SELECT MAX(date) FROM days WHERE output=? AND status='committed'", (outputKey(outFile),)).fetchone()[0]
+        finally:
+            con.close()
+
+    def summary(self, outFile, startDate, endDate): #number of days in each status between startDate and endDate
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            rows = con.execute('SELECT status, COUNT(*) FROM days WHERE output=? AND date BETWEEN ? AND ? GROUP BY status',
+                (outputKey(outFile), datetime.strftime(startDate, '%Y-%m-%d'), datetime.strftime(endDate, '%Y-%m-%d'))).fetchall()
+        finally:
+            con.close()
+        return dict(rows)
+
+    def addRaw(self, rows): #index cached files by (series, date, sha256); rows are (series, date, sha256, name, bytes, stored)
+        now = time.time()
+        with self.transaction() as con:
+            con.executemany('''INSERT INTO raw (series, date, sha256, name, bytes, stored, added, accessed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (series, date, sha256) DO UPDATE SET name=excluded.name, added=excluded.added, accessed=excluded.accessed''',
+                [r + (now, now) for r in rows])
+
+    def rawFiles(self, date, series): #the most recently cached file of each series for date (YYYY-MM-DD), as {series: (sha256, name)}
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            rows = con.execute('SELECT series, sha256, name FROM raw WHERE date=? AND series IN ('+','.join('?'*len(series))+') ORDER BY added',
+                (date,)+tuple(series)).fetchall()
+        finally:
+            con.close()
+        return {r[0]: (r[1], r[2]) for r in rows} #later rows win
+
+    def latestRaw(self, series): #(date, sha256, name) of the newest cached file of series, or None
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            return con.execute('SELECT date, sha256, name FROM raw WHERE series=? ORDER BY date DESC, added DESC LIMIT 1', (series,)).fetchone()
+        finally:
+            con.close()
+
+    def touchRaw(self, hashes):
+        with self.transaction() as con:
+            con.executemany('UPDATE raw SET accessed=? WHERE sha256=?', [(time.time(), h) for h in hashes])
+
+    def evictRaw(self, maxBytes, maxAge): #drop index entries past maxAge (days) or, least recently used first, past maxBytes; return the hashes no longer referenced
+        with self.transaction() as con:
+            if maxAge is not None:
+                con.execute('DELETE FROM raw WHERE accessed < ?', (time.time() - maxAge*86400,))
+            if maxBytes is not None:
+                total = 0
+                for sha, stored in con.execute('SELECT sha256, MAX(stored) FROM raw GROUP BY sha256 ORDER BY MAX(accessed) DESC').fetchall():
+                    total += stored
+                    if total > maxBytes:
+                        con.execute('DELETE FROM raw WHERE sha256=?', (sha,))
+            return {r[0] for r in con.execute('SELECT DISTINCT sha256 FROM raw').fetchall()}
+
+    def curtailPending(self, outFile): #dates (YYYY-MM-DD) appended with curtailment placeholders
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            rows = con.execute('SELECT date FROM days WHERE output=? AND curtail_pending=1 ORDER BY date', (outputKey(outFile),)).fetchall()
+        finally:
+            con.close()
+        return [r[0] for r in rows]
+
+    def setCurtailPending(self, outFile, dates, state): #replace the set of placeholder dates (YYYY-MM-DD)
+        key = outputKey(outFile)
+        with self.transaction() as con:
+            con.execute('UPDATE days SET curtail_pending=0 WHERE output=?', (key,))
+            con.executemany('''INSERT INTO days (output, date, status, curtail_pending, updated) VALUES (?, ?, 'committed', 1, ?)
+                ON CONFLICT (output, date) DO UPDATE SET curtail_pending=1''', [(key, d, time.time()) for d in dates])
+            self._set(con, state)
+
+    def overview(self): #(output, status, days, first date, last date) for every output and status
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            return con.execute('SELECT output, status, COUNT(*), MIN(date), MAX(date) FROM days GROUP BY output, status ORDER BY output, status').fetchall()
+        finally:
+            con.close()
+
+    def failures(self, limit=10): #(output, date, attempts, error) of the most recent failed days
+        con = sqlite3.connect(self.path, timeout=60)
+        try:
+            return con.execute("SELECT output, date, attempts, error FROM days WHERE status='failed' ORDER BY date DESC LIMIT ?", (limit,)).fetchall()
+        finally:
+            con.close()
@@ -0,0 +1,2080 @@
+
+#   Developed by Greg Miller, grmiller@ucdavis.edu
+#   Version 3.2.2
+#   Last Updated October 17, 2026
+
+#   Purpose: To compile publicly-available CAISO system-wide electricity demand, supply, and emissions data into a csv file
+#   Currently configured to coninue downloading data until the most recent data has been downloaded.
+
+#   All directories and files will be created the first time you run the script
+#   Run in unbuffered mode to make sure time.sleep() works: $ python -u 
+#%%
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import cProfile
+import csv
+import ctypes
+import ctypes.util
+from datetime import datetime, timedelta, timezone
+from functools import partial, reduce
+import gzip
+import hashlib
+import http.server
+import importlib
+import json
+import math
+import numpy as np
+import os 
+import pandas as pd
+from pathlib import Path
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytz
+import queue
+import re
+import select
+import shelve
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from urllib.parse import urljoin, urlparse
+
+from caiso.ledger import Ledger, claimTimeout, ledgerFile, workerGone, workerId
+
+class LazyImport: #stands in for a module (or a name in it) until first use, so commands that never download anything never load the scraping libraries
+    def __init__(self, module, name=None):
+        self.module = module
+        self.name = name
+        self.target = None
+
+    def load(self):
+        if self.target is None:
+            module = importlib.import_module(self.module)
+            self.target = getattr(module, self.name) if self.name else module
+        return self.target
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+requests = LazyImport('requests')
+HTTPAdapter = LazyImport('requests.adapters', 'HTTPAdapter')
+BeautifulSoup = LazyImport('bs4', 'BeautifulSoup')
+openpyxl = LazyImport('openpyxl')
+webdriver = LazyImport('selenium.webdriver')
+By = LazyImport('selenium.webdriver.common.by', 'By')
+WebDriverWait = LazyImport('selenium.webdriver.support.ui', 'WebDriverWait')
+EC = LazyImport('selenium.webdriver.support.expected_conditions')
+ActionChains = LazyImport('selenium.webdriver.common.action_chains', 'ActionChains')
+
+#environment variables
+demandURL = "http://www.caiso.com/TodaysOutlook/Pages/default.aspx"
+supplyURL = "http://www.caiso.com/TodaysOutlook/Pages/supply.aspx"
+emissionsURL = "http://www.caiso.com/TodaysOutlook/Pages/emissions.aspx"
+curtailURL = "http://www.caiso.com/informed/Pages/ManagingOversupply.aspx#dailyCurtailment"
+historyURL = "http://www.caiso.com/outlook/SP/History/{date}/{file}" #daily Today's Outlook CSVs, addressed directly by date
+liveURL = "http://www.caiso.com/outlook/SP/{file}" #today's Today's Outlook CSVs, updated every 5 minutes
+fetchBackend = 'http' #'http' fetches the daily CSVs directly; 'selenium' drives Chrome through the Today's Outlook pages (fallback)
+seriesNames = ['co2', 'demand', 'netdemand', 'renewables', 'supply'] #the five daily series, in the order copyData expects them
+workers = 4 #number of days fetched at the same time during a backfill
+poolMode = 'thread' #'thread' or 'asyncio' worker pool for backfills
+hostRate = 4.0 #maximum requests per second sent to any one host
+retries = 3 #attempts per day before a backfill gives up
+backoff = 2.0 #seconds to wait before the first retry, doubled after each failed attempt
+seriesPatterns = {'netdemand': re.compile(r'net[-_ ]?demand', re.I), 'demand': re.compile(r'demand', re.I), 'renewables': re.compile(r'renewables', re.I), \
+'supply': re.compile(r'supply|fuelsource', re.I), 'co2': re.compile(r'co2|emissions', re.I)} #file name patterns for each series, net demand checked before demand
+seriesRows = {'co2': [('imports', 'imports_co2'), ('natural gas', 'natgas_co2'), ('biogas', 'biogas_co2'), ('biomass', 'biomass_co2'), ('geothermal', 'geothermal_co2'), ('coal', 'coal_co2')], \
+'demand': [('day ahead', 'demand_DayAF'), ('hour ahead', 'demand_HourAF'), ('demand', 'demand_actual')], \
+'netdemand': [('day ahead', None), ('hour ahead', None), ('net demand', 'demand_net')], \
+'renewables': [('solar', 'solar_MW'), ('wind', 'wind_MW'), ('geothermal', 'geothermal_MW'), ('biomass', 'biomass_MW'), ('biogas', 'biogas_MW'), ('small hydro', 'sm_hydro_MW')], \
+'supply': [('renewables', 'renewable_MW'), ('solar|wind|geothermal|biomass|biogas|small hydro', 'renewable_MW'), ('natural gas', 'natgas_MW'), ('large hydro', 'lg_hydro_MW'), ('imports', 'imports_MW'), \
+('batter', 'battery_MW'), ('nuclear', 'nuclear_MW'), ('coal', 'coal_MW'), ('other', 'other_MW')]} #data file column for each row label of each series file, first match wins; None for rows not kept, rows sharing a column are summed (the history fuelsource.csv lists each renewable fuel)
+seriesColumns = {series: list(dict.fromkeys(col for _, col in rows if col is not None)) for series, rows in seriesRows.items()}
+intervalLabels = ['{:02d}:{:02d}'.format(i // 12, i % 12 * 5) for i in range(288)] #'00:00' ... '23:55'
+seriesFiles = {'co2': 'co2.csv', 'demand': 'demand.csv', 'netdemand': 'netdemand.csv', 'renewables': 'renewables.csv', 'supply': 'fuelsource.csv'} #file name of each series under historyURL
+downloads = Path.cwd() / 'downloads'
+curtailments = Path.cwd() / 'curtailments'
+dataFile = Path.cwd() / "outputs/CAISOdata.csv"
+storeDir = Path.cwd() / 'outputs/CAISOdata' #monthly Parquet partitions, laid out as <YYYY>/<YYYY-MM>.parquet
+mmapDir = Path.cwd() / 'outputs/CAISOmmap' #one fixed-width file per column, row i holding interval i since mmapEpoch
+mmapEpoch = datetime(2018, 1, 1) #the oldest Today's Outlook data is from April 2018
+storeFormat = 'parquet' #'parquet' writes to the partitioned store in storeDir; 'csv' appends to dataFile; 'mmap' writes to the memory-mapped store in mmapDir
+dataFile_dtypes = {'month': 'uint8', 'day': 'uint8', 'weekday': 'uint8', 'hour': 'uint8', 'interval': 'uint8', \
+'demand_DayAF': 'uint16', 'demand_HourAF': 'uint16', 'demand_actual': 'uint16', 'demand_net': 'uint16', \
+'wind_curtail_MW': 'float32', 'solar_curtail_MW': 'float32', 'solar_MW': 'uint16', 'wind_MW': 'uint16', 'geothermal_MW': 'uint16', \
+'biomass_MW': 'uint16', 'biogas_MW': 'uint16', 'sm_hydro_MW': 'uint16', 'battery_MW': 'int16', 'renewable_MW': 'uint16', 'natgas_MW': \
+'uint16', 'lg_hydro_MW': 'uint16', 'imports_MW': 'int16', 'nuclear_MW': 'uint16', 'coal_MW': 'uint16', 'other_MW': 'int16', 'imports_co2': \
+'int16', 'natgas_co2': 'uint16', 'biogas_co2': 'uint16', 'biomass_co2': 'uint8', 'geothermal_co2': 'uint8', 'coal_co2': 'uint16'} #battery output (negative while charging) is in the thousands of MW
+ct_dtypes = {'Hour': 'uint8', 'Interval': 'uint8', 'Wind Curtailment': 'float32', 'Solar Curtailment': 'float32'}
+ct_schema = pa.schema([('date', pa.timestamp('s')), ('hour', pa.uint8()), ('interval', pa.uint8()), ('wind_curtail_MW', pa.float32()), ('solar_curtail_MW', pa.float32())])
+curtailFile = curtailments / 'curtailment_data.parquet' #converted Curtailments sheet
+curtailCacheFile = curtailments / 'curtailment_cache.npz' #curtailment as one row of 288 intervals per day, rebuilt whenever postDate changes
+dataColumns = ['date','month','day','weekday','hour','interval','timestamp','5min_ending','demand_DayAF','demand_HourAF','demand_actual','demand_net', \
+'wind_curtail_MW','solar_curtail_MW','solar_MW','wind_MW','geothermal_MW','biomass_MW','biogas_MW','sm_hydro_MW','battery_MW','renewable_MW','natgas_MW', \
+'lg_hydro_MW','imports_MW','nuclear_MW','coal_MW','other_MW','imports_co2','natgas_co2','biogas_co2','biomass_co2','geothermal_co2','coal_co2'] #column order of the data file
+shelf = Path.cwd() / 'shelf.db' #progress state of versions before 3.1.10, carried over to the ledger on first run
+downloadTimeout = 60 #seconds to wait for a browser download to finish before the attempt fails
+scratchMaxAge = 86400 #seconds after which a scratch directory not owned by a process on this host is removed at startup
+pollInterval = 0.1 #seconds between directory scans where inotify is unavailable
+headless = True #run Chrome without a window; downloads still work because each one is routed through Page.setDownloadBehavior
+pageTimeout = 30 #seconds to wait for a page element before the attempt fails
+metricsLog = Path.cwd() / 'outputs/metrics.jsonl' #one JSON line per fetched day, committed day and run
+metricsFile = Path.cwd() / 'outputs/metrics.prom' #running totals in Prometheus text format, for the node_exporter textfile collector
+profileMode = None #'cpu' (cProfile) or 'memory' (tracemalloc) to profile the fetch and commit of every day into profileDir
+profileDir = Path.cwd() / 'outputs/profiles'
+livePoll = 300 #seconds between polls in --live mode, aligned to the 5-minute intervals
+liveLag = 20 #seconds after each 5-minute mark before polling, to give CAISO time to publish the interval
+liveIdle = {'curtailment': 3600, 'evictRaw': 86400, 'metrics': 0} #seconds between runs of the work done while --live waits for the next interval
+liveIdleMin = 30 #only start idle work with at least this many seconds to spare before the next poll
+forecastColumns = ['demand_DayAF', 'demand_HourAF'] #published ahead of time, so they don't show that an interval has arrived
+benchmarkSizes = {'1 day': 1, '1 month': 31, '3 years': 3*365} #histories replayed by --benchmark
+benchmarkBaseline = Path.cwd() / 'benchmark_baseline.json' #results that later --benchmark runs are compared against
+rawCache = Path.cwd() / 'rawcache' #every downloaded file, stored once under its SHA-256 so the output can be rebuilt without going back to CAISO
+rawCompression = True #gzip the cached files (the daily CSVs shrink by about 5x)
+rawCacheMaxBytes = None #evict the least recently used files once the cache grows past this size (None: no limit)
+rawCacheMaxAge = None #evict files not used for this many days (None: keep forever)
+qualityDir = Path.cwd() / 'outputs/quality' #one JSON data quality report per day
+quarantine = Path.cwd() / 'quarantine' #raw files of days kept out of the output
+quarantineChecks = ['unparseable', 'emptySeries', 'outOfRange', 'nonMonotonic'] #issues that keep a day out of the output; the rest are reported and the day is appended
+supplyTolerance = 0.1 #largest relative gap between total supply and actual demand before an interval counts as unbalanced
+supplyColumns = ['renewable_MW','natgas_MW','lg_hydro_MW','imports_MW','battery_MW','nuclear_MW','coal_MW','other_MW']
+rollupDir = Path.cwd() / 'outputs/rollups' #hourly, daily and monthly totals of the main output, updated as each day is appended
+energyColumns = [c for c in dataFile_dtypes if c.endswith('_MW') or c.startswith('demand_')] #MW, summed into MWh by the rollups
+co2Columns = [c for c in dataFile_dtypes if c.endswith('_co2')] #metric tons per hour, summed into metric tons by the rollups
+
+def main(backend=fetchBackend, workers=workers, mode=poolMode):
+    try:
+        _main(backend, workers, mode)
+    finally:
+        exportMetrics()
+
+def _main(backend, workers, mode):
+    start_i = time.time() #start initialization timer
+    #----- start initialization -----#
+    print('  Initializing...')
+    setupDirectories()
+    recoverCurtailJournal()
+    tmpDelete('downloads') #remove scratch directories left behind by interrupted runs, but not those of processes still running
+    user_initialized = 0 #track whether the start date is inputted by the user (1) or read from an existing output file (0)
+    if not outputPath().exists() and storeFormat!='csv' and dataFile.exists() and dataFile.stat().st_size: #an install from before the store: carry its data file over rather than ask for a start date
+        lastDate = importCSV()
+        if not getLedger().get('latestDate') and lastDate: #no progress state came with it, so continue from its last day
+            getLedger().set(latestDate=lastDate)
+    elif not outputPath().exists():
+        createOutput(outputPath())
+        print('  New '+storeFormat+' output created.\n  Please check the date dropdown menu for one of the charts at http://www.caiso.com/TodaysOutlook/Pages/default.aspx \n  and enter an available date to start data collection (formatted as "MM/DD/YYYY"):')
+        latestDate = input('  >')
+        user_initialized += 1
+        while True:
+            try:
+                latestDate = datetime.strptime(latestDate, '%m/%d/%Y')
+                break
+            except:
+                print('  Date format not recognized.\n  Please enter a date formatted as "MM/DD/YYYY":')
+                latestDate = input('  >')
+        latestDate = datetime.strftime(latestDate - timedelta(days=1), '%m/%d/%Y')
+        getLedger().set(latestDate=latestDate)
+    #----- end initialization -----#
+    latest = checkLatest()
+    latestDate_dt = latest[0]
+    fetcher = fetcherConfig(backend, workers) #configure the backend that will be used for data collection
+    yesterday = datetime.now() - timedelta(days=1) #create a datetime object for yesterday's date
+    end_i = time.time() #end initialization timer
+    print('Initialization time = '+str(end_i-start_i)+' seconds') #timer 
+    observe('initialize', end_i-start_i)
+    with stage('downloadCurtailment'):
+        ct_cache = downloadCurtailment(fetcher, user_initialized) #only needs to run once for each time the code runs
+    if latestDate_dt.date() < yesterday.date(): #continue downloading and appending data until the most recent data has been added
+        backfill(fetcher, latestDate_dt + timedelta(days=1), yesterday, ct_cache, workers=workers, mode=mode)
+    fetcher.close()
+    evictRaw()
+    print('Data file up to date with most recent data')
+
+def runBackfill(startDate, endDate, outFile=None, backend=fetchBackend, workers=workers, mode=poolMode): #re-ingest a date range (MM/DD/YYYY strings) into outFile
+    setupDirectories()
+    outFile = Path(outFile) if outFile else outputPath()
+    if not outFile.exists():
+        createOutput(outFile)
+    fetcher = fetcherConfig(backend, workers)
+    with stage('downloadCurtailment'):
+        ct_cache = downloadCurtailment(fetcher, 1) #don't fill curtailment into the main data file from a side backfill
+    backfill(fetcher, datetime.strptime(startDate, '%m/%d/%Y'), datetime.strptime(endDate, '%m/%d/%Y'), ct_cache, outFile, workers, mode)
+    fetcher.close()
+    evictRaw()
+    counts = getLedger().summary(outFile, datetime.strptime(startDate, '%m/%d/%Y'), datetime.strptime(endDate, '%m/%d/%Y'))
+    print('Backfill from '+startDate+' to '+endDate+' complete: '+', '.join(str(n)+' '+status for status, n in sorted(counts.items())))
+    exportMetrics()
+
+def setupDirectories(): #create the working directories and the ledger the first time the script runs
+    directories = ['outputs','downloads','curtailments','rawcache']
+    for d in directories: #if the directories don't exist, create them
+        directory = Path.cwd() / d
+        if not directory.exists():
+            os.makedirs(d)
+            print('  '+str(d)+' directory created.')
+    ledger = getLedger()
+    if ledger.get('latestDate') is None:
+        if list(Path.cwd().glob(shelf.name+'*')):
+            migrateShelf(ledger)
+        else:
+            ledger.set(latestDate='', postDate='', ct_latestDate='', pendingOffset=None, curtailTracked=True)
+
+def migrateShelf(ledger): #carry the progress state of older versions over from shelf.db
+    with shelve.open(str(shelf)) as s:
+        state = s['caiso']
+    ledger.set(latestDate=state['latestDate'], postDate=state['postDate'], ct_latestDate=state['ct_latestDate'])
+    savePending(state.get('pendingCurtail'), state.get('pendingOffset'))
+    for date in state.get('quarantined', []):
+        ledger.finish(outputPath(), datetime.strptime(date, '%m/%d/%Y'), 'quarantined')
+    print('  Progress state moved from '+shelf.name+' to '+ledgerFile.name+'.')
+
+_ledger = None
+def getLedger(): #the ledger shared by every function in this process
+    global _ledger
+    if _ledger is None:
+        _ledger = Ledger(ledgerFile, outputPath())
+    return _ledger
+
+def backfill(fetcher, startDate, endDate, ct_cache, outFile=None, workers=workers, mode=poolMode): #fetch every day from startDate to endDate on a worker pool, append them to outFile in date order
+    outFile = outFile or outputPath()
+    done = getLedger().done(outFile, startDate, endDate) #never download a day twice
+    days = [startDate + timedelta(days=i) for i in range((endDate.date() - startDate.date()).days + 1)]
+    days = [day for day in days if datetime.strftime(day, '%Y-%m-%d') not in done]
+    ordered = storeFormat=='csv' #rows can only be appended to a CSV file, so its days must be committed without gaps
+    last = getLedger().lastCommitted(outFile) if ordered else None
+    if last and days and datetime.strftime(days[0], '%Y-%m-%d') < last:
+        behind = [day for day in days if datetime.strftime(day, '%Y-%m-%d') < last]
+        print('  '+str(len(behind))+' missing day(s) before '+datetime.strftime(datetime.strptime(last, '%Y-%m-%d'), '%m/%d/%Y')+' skipped: the CSV output is kept in date order. Backfill them into a new --output, or use the parquet format.')
+        days = days[len(behind):]
+    if not fetcher.concurrent: #the browser can only work on one page at a time
+        workers = 1
+    print('  Backfilling '+str(len(days))+' days with '+str(workers)+' '+mode+' worker(s)...')
+    timer = {'count': 1, 'start': time.time(), 'gap': None}
+    task = partial(fetchTask, fetcher, outFile=outFile)
+    def commit(day, src): #runs on a single thread, so days are appended strictly in order; False once later days have to wait for the next run
+        if ordered and timer['gap'] is not None: #a CSV output can't have the missing day inserted later, so hold the following days back
+            if src is not None:
+                shutil.rmtree(src)
+                getLedger().finish(outFile, day, 'failed', error='held back until '+timer['gap']+' is appended')
+            return False
+        if src is None: #claimed by another worker, or failed and recorded in the ledger for the next run
+            if ordered and (getLedger().holder(outFile, day) or [None])[0] not in Ledger.doneStatuses:
+                timer['gap'] = datetime.strftime(day, '%m/%d/%Y')
+                print('  Days after '+timer['gap']+' will be fetched on the next run, so the CSV output stays in date order.')
+                return False
+            return True
+        with profiled(datetime.strftime(day, '%Y%m%d')+'-commit'):
+            report = copyData(day - timedelta(days=1), ct_cache, src, outFile)
+        shutil.rmtree(src)
+        if not report['quarantined']:
+            print('  Data for '+datetime.strftime(day, '%m/%d/%Y')+' appended to data file.')
+        end = time.time()
+        print('Loop # '+str(timer['count'])+' time = '+str(end-timer['start'])+' seconds') #loop timer
+        timer['count'] += 1
+        timer['start'] = end
+        return True
+    if mode=='asyncio':
+        with stage('backfill'):
+            asyncio.run(_backfillAsync(task, days, workers, commit))
+    elif mode=='thread':
+        with stage('backfill'), ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for day in days:
+                pending.append((day, pool.submit(task, day)))
+                if len(pending) >= 2 * workers: #keep a bounded number of fetched-but-uncommitted days on disk
+                    d, future = pending.popleft()
+                    if not commit(d, future.result()):
+                        break
+            while pending:
+                d, future = pending.popleft()
+                commit(d, future.result())
+    else:
+        raise ValueError('Unknown pool mode: '+str(mode))
+
+async def _backfillAsync(task, days, workers, commit):
+    semaphore = asyncio.Semaphore(workers)
+    async def run(day):
+        async with semaphore:
+            return await asyncio.to_thread(task, day)
+    pending = deque()
+    for day in days:
+        pending.append((day, asyncio.ensure_future(run(day))))
+        if len(pending) >= 2 * workers: #keep a bounded number of fetched-but-uncommitted days on disk, as the thread pool does
+            d, t = pending.popleft()
+            if not commit(d, await t):
+                break
+    while pending:
+        d, t = pending.popleft()
+        commit(d, await t)
+
+def fetchTask(fetcher, day, outFile=None): #claim one day in the ledger and download it into its own scratch directory, retrying with exponential backoff
+    ledger = getLedger()
+    outFile = outFile or outputPath()
+    if not ledger.claim(outFile, day, workerId()):
+        status, worker = ledger.holder(outFile, day) or (None, None)
+        if status not in ledger.doneStatuses:
+            print('  Skipped '+datetime.strftime(day, '%m/%d/%Y')+': '+str(status)+' by '+str(worker)+', which is still running or stopped less than '+str(claimTimeout)+' seconds ago.')
+            count('daysSkipped')
+        return None
+    for attempt in range(retries):
+        dest = scratchDir(datetime.strftime(day, '%Y%m%d')) #a fresh directory per attempt, so workers never share files
+        try:
+            start = time.time()
+            with stage('fetch'), profiled(datetime.strftime(day, '%Y%m%d')+'-fetch'):
+                paths = fetcher.fetchDay(day, dest)
+            ledger.fetched(outFile, day, {seriesOf(path): path for path in paths}, time.time() - start)
+            cacheRaw(paths, day)
+            size = sum(os.stat(path).st_size for path in paths)
+            count('bytesFetched', size)
+            count('filesFetched', len(paths))
+            logMetrics('fetch', date=datetime.strftime(day, '%Y-%m-%d'), seconds=time.time() - start, bytes=size, attempt=attempt + 1)
+            return dest
+        except fetchErrors() as e:
+            shutil.rmtree(dest, ignore_errors=True)
+            count('fetchErrors')
+            if attempt==retries-1:
+                count('daysFailed')
+                logMetrics('fetch', date=datetime.strftime(day, '%Y-%m-%d'), seconds=time.time() - start, error=str(e), attempt=attempt + 1)
+                print('  Download of '+datetime.strftime(day, '%m/%d/%Y')+' failed ('+str(e)+'), it will be retried on the next run.')
+                ledger.finish(outFile, day, 'failed', error=str(e))
+                return None
+            wait = backoff * 2 ** attempt
+            print('  Download of '+datetime.strftime(day, '%m/%d/%Y')+' failed ('+str(e)+'), retrying in '+str(wait)+' seconds...')
+            count('retries')
+            count('waitSeconds', wait)
+            time.sleep(wait)
+
+def fetchErrors(): #exceptions that make a download attempt worth retrying, from whichever backend libraries are loaded
+    errors = [OSError, requests.RequestException]
+    if 'selenium' in sys.modules:
+        from selenium.common.exceptions import WebDriverException
+        errors.append(WebDriverException)
+    return tuple(errors)
+
+class RateLimiter: #space out requests to each host so concurrent workers stay under a fixed request rate
+    def __init__(self, rate=hostRate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.lock = threading.Lock()
+        self.next = {}
+
+    def wait(self, host): #block until the next request slot for host
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next.get(host, now))
+            self.next[host] = slot + self.interval
+        if slot > now:
+            count('waitSeconds', slot - now)
+            time.sleep(slot - now)
+
+stageTimes = {} #seconds this process has spent in each ingest stage
+stageCalls = {} #number of times each stage has run
+counters = {} #bytes fetched, rows written, retries, wait time, ...
+stageLock = threading.Lock()
+
+@contextmanager
+def stage(name): #add the time spent in the block to stageTimes[name]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+def observe(name, seconds): #record one run of a stage timed elsewhere
+    with stageLock:
+        stageTimes[name] = stageTimes.get(name, 0) + seconds
+        stageCalls[name] = stageCalls.get(name, 0) + 1
+
+def count(name, n=1):
+    with stageLock:
+        counters[name] = counters.get(name, 0) + n
+
+def logMetrics(event, **fields): #append one event to the JSON-lines log
+    line = json.dumps(dict({'time': datetime.now().isoformat(timespec='seconds'), 'event': event}, **fields))
+    with stageLock:
+        os.makedirs(metricsLog.parent, exist_ok=True)
+        with open(metricsLog, 'a') as f:
+            f.write(line+'\n')
+
+def writePrometheus(path=metricsFile): #write the running totals in Prometheus text format, swapping the file in whole so a scrape never sees half of it
+    with stageLock:
+        times, calls, totals = dict(stageTimes), dict(stageCalls), dict(counters)
+    lines = ['# HELP caiso_stage_seconds_total Time spent in each ingest stage.', '# TYPE caiso_stage_seconds_total counter']
+    lines += ['caiso_stage_seconds_total{stage="'+name+'"} '+repr(float(seconds)) for name, seconds in sorted(times.items())]
+    lines += ['# HELP caiso_stage_calls_total Number of times each ingest stage ran.', '# TYPE caiso_stage_calls_total counter']
+    lines += ['caiso_stage_calls_total{stage="'+name+'"} '+str(n) for name, n in sorted(calls.items())]
+    for name, value in sorted(totals.items()):
+        metric = 'caiso_'+re.sub(r'([A-Z])', r'_\1', name).lower()+'_total'
+        lines += ['# TYPE '+metric+' counter', metric+' '+repr(float(value))]
+    latestDate = getLedger().get('latestDate')
+    if latestDate:
+        lines += ['# HELP caiso_latest_date_seconds Date of the newest day in the main output, as a Unix timestamp.', '# TYPE caiso_latest_date_seconds gauge',
+            'caiso_latest_date_seconds '+str(int(datetime.strptime(latestDate, '%m/%d/%Y').timestamp()))]
+    lines += ['# TYPE caiso_last_update_seconds gauge', 'caiso_last_update_seconds '+str(int(time.time()))]
+    os.makedirs(Path(path).parent, exist_ok=True)
+    tmp = tmpPath(path)
+    tmp.write_text('\n'.join(lines)+'\n')
+    os.replace(tmp, path)
+
+def exportMetrics(): #log the totals of this run and refresh the Prometheus file
+    with stageLock:
+        fields = {'stages': dict(stageTimes), 'calls': dict(stageCalls), 'counters': dict(counters)}
+    logMetrics('run', **fields)
+    writePrometheus()
+
+profileLock = threading.Lock() #one profiled block at a time: only one profiler can be active per process, and tracemalloc snapshots are process-wide
+
+@contextmanager
+def profiled(name): #profile the block into profileDir/name when profileMode is set
+    if profileMode is None:
+        yield
+        return
+    os.makedirs(profileDir, exist_ok=True)
+    with profileLock, _profiled(name):
+        yield
+
+@contextmanager
+def _profiled(name):
+    if profileMode=='cpu':
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(profileDir / (name+'.prof')) #open with pstats or snakeviz
+    elif profileMode=='memory':
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        try:
+            yield
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            stats = tracemalloc.take_snapshot().compare_to(before, 'lineno')
+            with open(profileDir / (name+'.txt'), 'w') as f:
+                f.write('peak traced memory: '+str(round(peak / 2**20, 2))+' MB\n')
+                f.writelines(str(stat)+'\n' for stat in stats[:25])
+    else:
+        raise ValueError('Unknown profile mode: '+str(profileMode))
+
+def outputPath(): #the main output: the Parquet store, the CSV data file or the memory-mapped store
+    return {'parquet': storeDir, 'mmap': mmapDir}.get(storeFormat, dataFile)
+
+def createOutput(outFile): #create an empty output of the configured format
+    if storeFormat in ('parquet', 'mmap'):
+        os.makedirs(outFile, exist_ok=True)
+    else:
+        with open(outFile, 'w+', newline=''):
+            pass
+
+def appendData(df, outFile): #add one or more days of rows to the output
+    if storeFormat=='parquet':
+        writeStore(df, outFile)
+    elif storeFormat=='mmap':
+        MmapStore(outFile).write(df)
+    else:
+        df = df.drop(columns=['timestamp'], errors='ignore') #the CSV layout predates the timestamp column, which can be rebuilt from date/hour/interval
+        with open(outFile,'a', newline='') as f:    #append dataframe to outFile CSV
+            if os.stat(outFile).st_size == 0: #if outFile empty, header=True, otherwise header=False
+                df.to_csv(f, header=True, index=False)
+            else:
+                df.to_csv(f, header=False, index=False)
+
+class MmapStore: #append-only fixed-width column files indexed by interval since mmapEpoch: writing a day or reading any window costs the same at any history length
+    derived = ['month', 'day', 'weekday', 'hour', 'interval'] #follow from the interval number, so they are not stored
+
+    def __init__(self, root=mmapDir):
+        self.root = Path(root)
+        self.columns = {col: np.dtype(dtype) for col, dtype in dataFile_dtypes.items() if col not in self.derived}
+        self.columns['present'] = np.dtype('uint8') #1 where the interval has been written
+        self.maps = {}
+        meta = self.root / 'meta.json'
+        outdated = []
+        if meta.exists():
+            stored = json.loads(meta.read_text())['columns']
+            outdated = [col for col, dtype in self.columns.items() if col in stored and np.dtype(stored[col][0])!=dtype]
+            for col in outdated: #written by a version with a narrower type for the column
+                self.convert(col, np.dtype(stored[col][0]))
+            outdated += [col for col, (dtype, missing) in stored.items() if isinstance(missing, float)] #NaN, written by a version that produced invalid JSON
+        if not meta.exists() or outdated: #describes the layout for readers in other processes and languages
+            os.makedirs(self.root, exist_ok=True)
+            meta.write_text(json.dumps({'epoch': datetime.strftime(mmapEpoch, '%Y-%m-%d'), 'intervalsPerDay': 288,
+                'columns': {col: [dtype.str, None if dtype.kind=='f' else self.missing(dtype)] for col, dtype in self.columns.items()}}, indent=1, allow_nan=False)) #null: gaps in float columns are NaN
+
+    def convert(self, col, old): #rewrite a column file stored as dtype old in the current dtype, carrying the gap sentinel over
+        path = self.root / (col+'.bin')
+        if path.exists():
+            values = np.fromfile(path, dtype=old)
+            new = values.astype(self.columns[col])
+            if old.kind!='f':
+                new[values==self.missing(old)] = self.missing(self.columns[col])
+            tmp = tmpPath(path)
+            new.tofile(tmp)
+            os.replace(tmp, path)
+        print('  '+col+' in '+str(self.root)+' converted from '+old.name+' to '+self.columns[col].name+'.')
+
+    @staticmethod
+    def missing(dtype): #value that marks a gap: NaN for floats, the largest (unsigned) or smallest (signed) value for integers
+        if dtype.kind=='f':
+            return float('nan')
+        return int(np.iinfo(dtype).max if dtype.kind=='u' else np.iinfo(dtype).min)
+
+    @staticmethod
+    def index(dates): #interval number of the first interval of each date
+        days = (np.asarray(dates, dtype='datetime64[D]') - np.datetime64(mmapEpoch, 'D')).astype('int64')
+        if (days < 0).any():
+            raise ValueError('The memory-mapped store starts at '+datetime.strftime(mmapEpoch, '%m/%d/%Y'))
+        return days * 288
+
+    def write(self, df): #write rows in place at their interval numbers; rows of whole days are contiguous, so each column is one write
+        dates = df['date'] if pd.api.types.is_datetime64_any_dtype(df['date']) else pd.to_datetime(df['date'], format='%m/%d/%Y')
+        rows = self.index(dates.to_numpy()) + df['hour'].to_numpy().astype('int64') * 12 + df['interval'].to_numpy().astype('int64') - 1
+        lo, hi = rows.min(), rows.max() + 1
+        for col, dtype in self.columns.items():
+            if col=='present':
+                if not set(self.columns).issubset(set(df.columns) | {'present'}): #a partial write (e.g. curtailment) leaves the rest of the row as it is
+                    continue
+                values = np.ones(len(df), dtype='float64')
+            elif col in df.columns:
+                values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            else:
+                continue
+            block = np.full(hi - lo, self.missing(dtype), dtype=dtype)
+            block[rows - lo] = np.where(np.isnan(values), self.missing(dtype), values) if dtype.kind!='f' else values
+            path = self.root / (col+'.bin')
+            with open(path, 'r+b' if path.exists() else 'w+b') as f: #writes past the end grow the file; any gap reads as zeros, and present=0 marks it
+                f.seek(int(lo) * dtype.itemsize)
+                f.write(block.tobytes())
+        self.maps.clear()
+
+    def clear(self, day): #mark the intervals of day as never written
+        path = self.root / 'present.bin'
+        lo = int(self.index([day])[0])
+        if path.exists() and os.stat(path).st_size > lo:
+            with open(path, 'r+b') as f:
+                f.seek(lo)
+                f.write(bytes(min(288, os.stat(path).st_size - lo)))
+        self.maps.clear()
+
+    def column(self, col): #the whole column as a read-only memory map, reopened only when the file has grown
+        path = self.root / (col+'.bin')
+        size = os.stat(path).st_size // self.columns[col].itemsize if path.exists() else 0
+        if col not in self.maps or len(self.maps[col]) < size:
+            self.maps[col] = np.memmap(path, dtype=self.columns[col], mode='r') if size else np.empty(0, dtype=self.columns[col])
+        return self.maps[col]
+
+    def read(self, start, end, columns=None): #zero-copy slices of the intervals from start to end (dates, inclusive), keyed by column
+        lo, hi = int(self.index([start])[0]), int(self.index([end])[0]) + 288
+        return {col: self.column(col)[lo:hi] for col in (columns or self.columns)}
+
+    def frame(self, start, end, columns=None): #the same window as a DataFrame in the layout of the other outputs (this copies)
+        columns = [c for c in (columns or dataFile_dtypes) if c in self.columns]
+        slices = self.read(start, end, columns+['present'])
+        n = len(slices['present'])
+        slots = np.arange(n)
+        dates = np.datetime64(start, 'D') + (slots // 288).astype('timedelta64[D]')
+        df = pd.DataFrame({'date': dates.astype('datetime64[ns]'), 'hour': (slots % 288 // 12).astype('uint8'), 'interval': (slots % 12 + 1).astype('uint8')})
+        for col in columns:
+            values = np.asarray(slices[col][:n], dtype='float64')
+            dtype = self.columns[col]
+            if dtype.kind!='f':
+                values[values==self.missing(dtype)] = np.nan
+            df[col] = typedColumn(values, dtype.name)
+        return df[slices['present'].astype(bool)].reset_index(drop=True)
+
+def nullableDtype(dtype): #the pandas nullable integer type for an integer dtype ('uint16' -> 'UInt16'), floats as they are
+    if 'int' not in dtype:
+        return dtype
+    return 'UInt'+dtype[4:] if dtype.startswith('uint') else 'Int'+dtype[3:]
+
+def typedColumn(values, dtype): #cast a float array to dtype, using a nullable integer type if it has gaps
+    values = np.asarray(values, dtype='float64')
+    if 'int' in dtype and np.isnan(values).any():
+        return pd.array(np.trunc(values), dtype=nullableDtype(dtype))
+    return values.astype(dtype)
+
+def csvDtypes(): #dataFile_dtypes with nullable integers, for reading a data file that may have gaps (days appended with missing values)
+    return {col: nullableDtype(dtype) for col, dtype in dataFile_dtypes.items()}
+
+def castColumns(df): #apply the compact dataFile_dtypes, using nullable integers for columns with gaps
+    for col, dtype in dataFile_dtypes.items():
+        if col not in df.columns:
+            continue
+        df[col] = typedColumn(pd.to_numeric(df[col], errors='coerce').astype('float64'), dtype)
+    df['date'] = pd.to_datetime(df['date'], format='%m/%d/%Y')
+    if 'timestamp' not in df.columns or df['timestamp'].isna().any(): #rows imported from the CSV layout, which has no timestamp column
+        local = df['date'].to_numpy() + (df['hour'].to_numpy().astype('int64') * 60 + (df['interval'].to_numpy().astype('int64') - 1) * 5).astype('timedelta64[m]')
+        timestamps = localTimestamps(local)
+        if 'timestamp' in df.columns:
+            df['timestamp'] = timestamps
+        else:
+            df.insert(df.columns.get_loc('interval') + 1 if 'interval' in df.columns else len(df.columns), 'timestamp', timestamps)
+    return df
+
+def partitionPath(year, month, store=storeDir): #file holding one month of data
+    return Path(store) / str(year) / ('{}-{:02d}.parquet'.format(year, month))
+
+def tmpPath(path): #temporary file to write before swapping it in as path, unique to the process and thread so concurrent writers never share one
+    path = Path(path)
+    return path.with_name(path.name+'.'+str(os.getpid())+'.'+str(threading.get_ident())+'.tmp')
+
+_outputLocks = {}
+_outputLocksGuard = threading.Lock()
+
+@contextmanager
+def outputLock(outFile): #hold the output's lock file, so only one process (and thread) at a time changes the output, its rollups and their state in the ledger; reentrant
+    key = str(Path(outFile).resolve())
+    with _outputLocksGuard:
+        entry = _outputLocks.setdefault(key, {'lock': threading.RLock(), 'file': None, 'depth': 0})
+    with entry['lock']:
+        if entry['depth']==0:
+            os.makedirs(Path(key).parent, exist_ok=True)
+            f = open(key+'.lock', 'a+b')
+            start = time.perf_counter()
+            if os.name=='nt':
+                import msvcrt
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1) #retries for 10 seconds before raising
+                        break
+                    except OSError:
+                        pass
+            else:
+                import fcntl
+                fcntl.flock(f, fcntl.LOCK_EX) #released by the system if the process dies
+            count('lockWaitSeconds', time.perf_counter() - start)
+            entry['file'] = f
+        entry['depth'] += 1
+        try:
+            yield
+        finally:
+            entry['depth'] -= 1
+            if entry['depth']==0:
+                entry['file'].close() #closing releases the lock
+                entry['file'] = None
+
+def writeParquet(df, path): #write to a temporary file and swap it in, so a crash never leaves a half-written partition
+    os.makedirs(path.parent, exist_ok=True)
+    tmp = tmpPath(path)
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+def writeStore(df, store=storeDir): #merge rows into the monthly partitions of the store; cost depends on the month, not the history
+    df = castColumns(df.copy())
+    for (year, month), part in df.groupby([df['date'].dt.year, df['date'].dt.month]):
+        path = partitionPath(year, month, store)
+        if path.exists():
+            part = pd.concat([pd.read_parquet(path), part], ignore_index=True)
+            part = part.drop_duplicates(['date', 'hour', 'interval'], keep='last') #re-ingested days replace the old rows
+            part = castColumns(part)
+        writeParquet(part.sort_values(['date', 'hour', 'interval']), path)
+
+def readStore(start=None, end=None, columns=None, store=storeDir): #load the rows from start to end (inclusive), reading only the partitions and columns needed
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    filters = []
+    if start is not None:
+        filters.append(('date', '>=', start))
+    if end is not None:
+        filters.append(('date', '<=', end))
+    frames = []
+    for path in sorted(Path(store).glob('*/*.parquet')):
+        year, month = (int(x) for x in path.stem.split('-'))
+        if start is not None and (year, month) < (start.year, start.month):
+            continue
+        if end is not None and (year, month) > (end.year, end.month):
+            continue
+        frames.append(pd.read_parquet(path, columns=columns, filters=filters or None))
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+def exportCSV(path, start=None, end=None, columns=None, store=storeDir): #write part or all of the store out in the original CSV layout
+    df = readStore(start, end, columns, store)
+    if 'date' in df.columns:
+        df['date'] = df['date'].dt.strftime('%m/%d/%Y')
+    df.to_csv(path, index=False)
+
+def importCSV(path=dataFile, outFile=None, chunksize=288*31): #carry an existing CSV data file over to the Parquet or memory-mapped output, return the date of its last row
+    outFile = outFile or outputPath()
+    with outputLock(outFile):
+        return _importCSV(path, outFile, chunksize)
+
+def _importCSV(path, outFile, chunksize):
+    print('  Importing '+str(path)+' into '+str(outFile)+'...')
+    os.makedirs(outFile, exist_ok=True)
+    lastDate = None
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        appendData(chunk, outFile)
+        lastDate = chunk['date'].iloc[-1]
+    savePending(None, None) #find the imported placeholders on the next curtailment fill
+    if Path(outFile).resolve()==outputPath().resolve():
+        rebuildRollups()
+    return lastDate
+
+def rollupName(col): #name of a column's total in the rollups
+    if col in co2Columns:
+        return col+'_t'
+    return col+'h' if col.endswith('_MW') else col+'_MWh'
+
+def rollupPath(freq, year=None): #hourly and daily rollups are split by year, so updating a day rewrites one small file
+    if freq=='month':
+        return rollupDir / 'month.parquet'
+    return rollupDir / freq / (str(year)+'.parquet')
+
+def hourlyRollup(df): #energy (MWh) and emissions (t) of each hour in df, plus the number of intervals behind each total
+    dates = df['date'] if pd.api.types.is_datetime64_any_dtype(df['date']) else pd.to_datetime(df['date'], format='%m/%d/%Y')
+    totals = {'date': dates.to_numpy(), 'hour': df['hour'].to_numpy().astype('uint8'), 'intervals': np.ones(len(df), dtype='uint16')}
+    for col in energyColumns + co2Columns: #each row covers 5 minutes
+        totals[rollupName(col)] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan) * (5 / 60)
+    return pd.DataFrame(totals).groupby(['date', 'hour'], as_index=False).sum(min_count=1)
+
+def mergeRollup(path, rows, keys): #replace the rows of a rollup file that share keys with rows
+    if path.exists():
+        rows = pd.concat([pd.read_parquet(path), rows], ignore_index=True).drop_duplicates(keys, keep='last')
+    writeParquet(rows.sort_values(keys), path)
+
+def updateRollups(df): #bring the rollups up to date with the rows of whole days in df; cost depends on the days, not the history
+    hourly = hourlyRollup(df)
+    daily = hourly.drop(columns='hour').groupby('date', as_index=False).sum(min_count=1)
+    for year, rows in hourly.groupby(hourly['date'].dt.year):
+        mergeRollup(rollupPath('hour', year), rows, ['date', 'hour'])
+    months = set()
+    for year, rows in daily.groupby(daily['date'].dt.year):
+        mergeRollup(rollupPath('day', year), rows, ['date'])
+        months.update((year, m) for m in rows['date'].dt.month.unique())
+    for year in {y for y, m in months}: #recompute each touched month from its (at most 31) daily rows
+        days = pd.read_parquet(rollupPath('day', year))
+        days = days[days['date'].dt.month.isin([m for y, m in months if y==year])]
+        month = days['date'].dt.to_period('M').dt.to_timestamp().rename('date') #months are keyed by their first day
+        monthly = days.drop(columns='date').groupby(month).sum(min_count=1).reset_index()
+        mergeRollup(rollupPath('month'), monthly, ['date'])
+
+def dropDay(day, outFile): #remove every row of day from a Parquet or memory-mapped output, and from the rollups if it is the main output
+    if storeFormat=='parquet':
+        path = partitionPath(day.year, day.month, outFile)
+        if path.exists():
+            part = pd.read_parquet(path)
+            part = part[part['date']!=pd.Timestamp(day.date())]
+            if len(part):
+                writeParquet(part, path)
+            else:
+                os.remove(path)
+    elif storeFormat=='mmap':
+        MmapStore(outFile).clear(day)
+    if Path(outFile).resolve()==outputPath().resolve():
+        dropRollups(day)
+
+def dropRollups(day): #remove day from the hourly and daily rollups and recompute its month
+    date = pd.Timestamp(day.date())
+    for freq in ['hour', 'day']:
+        path = rollupPath(freq, day.year)
+        if path.exists():
+            rows = pd.read_parquet(path)
+            writeParquet(rows[rows['date']!=date], path)
+    if rollupPath('month').exists():
+        monthly = pd.read_parquet(rollupPath('month'))
+        monthly = monthly[monthly['date']!=pd.Timestamp(day.year, day.month, 1)]
+        days = pd.read_parquet(rollupPath('day', day.year)) if rollupPath('day', day.year).exists() else None
+        if days is not None and (days['date'].dt.month==day.month).any():
+            days = days[days['date'].dt.month==day.month]
+            month = days['date'].dt.to_period('M').dt.to_timestamp().rename('date')
+            monthly = pd.concat([monthly, days.drop(columns='date').groupby(month).sum(min_count=1).reset_index()], ignore_index=True)
+        writeParquet(monthly.sort_values('date'), rollupPath('month'))
+
+def rebuildRollups(): #recompute the rollups from the whole main output
+    with outputLock(outputPath()):
+        _rebuildRollups()
+
+def _rebuildRollups():
+    print('  Rebuilding rollups...')
+    shutil.rmtree(rollupDir, ignore_errors=True)
+    if storeFormat=='parquet':
+        chunks = (pd.read_parquet(path) for path in sorted(storeDir.glob('*/*.parquet')))
+    elif storeFormat=='mmap':
+        store = MmapStore()
+        days = len(store.column('present')) // 288
+        chunks = (store.frame(mmapEpoch + timedelta(days=i), mmapEpoch + timedelta(days=min(i + 30, days - 1))) for i in range(0, days, 31))
+    else:
+        chunks = pd.read_csv(dataFile, chunksize=288*31) #whole days, since every day has 288 rows
+    for chunk in chunks:
+        updateRollups(chunk)
+
+def query(start=None, end=None, columns=None, freq=None): #rows of the main output (freq None) or of its 'hour', 'day' or 'month' rollup from start to end, inclusive
+    #columns of the rollups are named by rollupName; renewable_share and co2_intensity (t/MWh) are derived from them on the fly
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    if freq is None:
+        if storeFormat=='parquet':
+            return readStore(start, end, columns)
+        if storeFormat=='mmap':
+            store = MmapStore()
+            start = start if start is not None else pd.Timestamp(mmapEpoch)
+            end = end if end is not None else pd.Timestamp(mmapEpoch) + pd.Timedelta(days=len(store.column('present')) // 288 - 1)
+            return store.frame(start, end, columns)
+        frames = []
+        for chunk in pd.read_csv(dataFile, usecols=(['date']+[c for c in columns if c!='date']) if columns else None, chunksize=288*31):
+            dates = pd.to_datetime(chunk['date'], format='%m/%d/%Y')
+            keep = pd.Series(True, index=chunk.index)
+            if start is not None:
+                keep &= dates >= start
+            if end is not None:
+                keep &= dates <= end
+            frames.append(chunk[keep])
+        return pd.concat(frames, ignore_index=True)
+    supply = [rollupName(c) for c in supplyColumns]
+    derived = {'renewable_share': [rollupName('renewable_MW')] + supply, 'co2_intensity': [rollupName(c) for c in co2Columns] + supply}
+    keys = ['date', 'hour'] if freq=='hour' else ['date']
+    needed = None
+    if columns:
+        needed = list(dict.fromkeys(keys + [c for col in columns for c in derived.get(col, [col])]))
+    if freq=='month':
+        paths = [rollupPath('month')]
+    elif freq in ('hour', 'day'):
+        paths = sorted(p for p in (rollupDir / freq).glob('*.parquet')
+            if (start is None or int(p.stem) >= start.year) and (end is None or int(p.stem) <= end.year)) #only the years asked for
+    else:
+        raise ValueError('Unknown rollup frequency: '+str(freq))
+    filters = [f for f in [('date', '>=', start) if start is not None else None, ('date', '<=', end) if end is not None else None] if f] or None
+    frames = [pd.read_parquet(p, columns=needed, filters=filters) for p in paths if p.exists()]
+    if not frames:
+        return pd.DataFrame(columns=needed)
+    df = pd.concat(frames, ignore_index=True)
+    if needed is None or any(col in derived for col in columns):
+        total = df[supply].sum(axis=1, min_count=1)
+        df['renewable_share'] = df[rollupName('renewable_MW')] / total
+        df['co2_intensity'] = df[[rollupName(c) for c in co2Columns]].sum(axis=1, min_count=1) / total
+    return df[keys + [c for c in columns if c not in keys]] if columns else df
+
+def checkLatest(): #check the ledger for date of most recent data
+    latestDate = getLedger().get('latestDate')
+    latestDate_dt = datetime.strptime(latestDate, '%m/%d/%Y') #parse the date as a date object
+    dataDate = dataDateFor(latestDate_dt)
+    return latestDate_dt, dataDate
+
+def dataDateFor(latestDate_dt): #return the datepicker attribute for the day after latestDate_dt
+    unixts = latestDate_dt.timestamp() #convert date to epoch/unix time
+    pst = pytz.timezone('America/Los_Angeles') #need to account for daylight savings
+    offset = int(pst.localize(datetime.fromtimestamp(unixts)).strftime('%z')[2]) #return the number of hours behind UTC
+    dataDate = math.trunc((unixts - (3600 * offset)) * 1000 + 86400000) #this is the data attribute that the website uses to identify dates in the datepicker dropdown #subtracting 28,000 sec converts to PST, convert to millisec, add one day
+    return dataDate
+
+def seriesFileName(series, day): #name a downloaded series file the same way the Today's Outlook download buttons do
+    return 'CAISO-'+series+'-'+datetime.strftime(day, '%Y%m%d')+'.csv'
+
+def fetcherConfig(backend, workers=workers): #configure the backend used to download the daily series and the curtailment workbook
+    if backend=='http':
+        return HTTPFetcher()
+    elif backend=='selenium':
+        return SeleniumFetcher(workers)
+    raise ValueError('Unknown fetch backend: '+str(backend))
+
+class HTTPFetcher: #download the daily CSVs directly by date over a pooled HTTP session
+    concurrent = True
+
+    def __init__(self, baseURL=historyURL, poolSize=8, timeout=30, rate=hostRate, liveURL=liveURL, curtailURL=curtailURL): #point the URLs at fixtureServer to run offline
+        self.baseURL = baseURL
+        self.liveURL = liveURL
+        self.curtailURL = curtailURL
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize, max_retries=3) #keep connections to the host alive between requests
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.validators = {} #url: (ETag, Last-Modified, body) of files fetched with conditional=True
+
+    def fetchDay(self, day, dest, baseURL=None, conditional=False): #download all five series for one day into dest
+        return [self.fetchSeries(series, day, dest, baseURL, conditional) for series in seriesNames]
+
+    def fetchRaw(self, series, day, baseURL=None, conditional=False): #one series for one day, exactly as the server sends it
+        url = (baseURL or self.baseURL).format(date=datetime.strftime(day, '%Y%m%d'), file=seriesFiles[series])
+        headers = {}
+        if conditional and url in self.validators: #ask for the file only if it has changed since the last request
+            etag, modified, body = self.validators[url]
+            headers = {k: v for k, v in [('If-None-Match', etag), ('If-Modified-Since', modified)] if v}
+        self.limiter.wait(urlparse(url).netloc)
+        r = self.session.get(url, timeout=self.timeout, headers=headers)
+        if r.status_code==304:
+            count('notModified')
+            return body
+        r.raise_for_status()
+        if conditional:
+            self.validators[url] = (r.headers.get('ETag'), r.headers.get('Last-Modified'), r.content)
+        return r.content
+
+    def fetchSeries(self, series, day, dest, baseURL=None, conditional=False): #download one series for one day, return the path of the saved file
+        path = Path(dest) / seriesFileName(series, day)
+        path.write_bytes(self.fetchRaw(series, day, baseURL, conditional)) #saved as sent, so the raw cache holds CAISO's bytes; readSeries handles the layout
+        return path
+
+    def curtailmentPage(self): #return the html of the page that links to the curtailment workbook
+        r = self.session.get(self.curtailURL, timeout=self.timeout)
+        r.raise_for_status()
+        return r.text
+
+    def fetchCurtailment(self, dest): #download the Production and Curtailments workbook into dest
+        soup = BeautifulSoup(self.curtailmentPage(), 'lxml')
+        link = [a for a in soup.find_all('a', href=True) if 'Production and Curtailments Data' in a.get_text()][0]
+        url = urljoin(self.curtailURL, link['href'])
+        path = Path(dest) / os.path.basename(url.split('?')[0])
+        with self.session.get(url, timeout=self.timeout, stream=True) as r:
+            r.raise_for_status()
+            with open(path, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+        return path
+
+    def close(self):
+        self.session.close()
+
+class SeleniumFetcher: #fallback backend: click through the Today's Outlook pages in a pool of Chrome sessions
+    concurrent = True
+
+    def __init__(self, size=workers):
+        self.pool = BrowserPool(size)
+
+    def fetchDay(self, day, dest):
+        with self.pool.session() as session:
+            watcher = session.downloadTo(dest)
+            try:
+                return downloadDemand(session, day, watcher) + downloadSupply(session, day, watcher) + downloadEmissions(session, day, watcher)
+            finally:
+                watcher.close()
+
+    def curtailmentPage(self):
+        with self.pool.session() as session:
+            browser = session.page(curtailURL, (By.CSS_SELECTOR, 'span.postDate'))
+            return browser.page_source
+
+    def fetchCurtailment(self, dest):
+        with self.pool.session() as session:
+            watcher = session.downloadTo(dest)
+            try:
+                browser = session.page(curtailURL, (By.PARTIAL_LINK_TEXT, 'Production and Curtailments Data'))
+                browser.find_elements(By.PARTIAL_LINK_TEXT, 'Production and Curtailments Data')[0].click() #download file
+                return watcher.wait() #the workbook is large, so it may need most of the timeout
+            finally:
+                watcher.close()
+
+    def close(self):
+        self.pool.close()
+
+class BrowserPool: #long-lived Chrome sessions shared by the fetch workers, started on first use
+    def __init__(self, size):
+        self.size = size
+        self.idle = queue.Queue()
+        self.started = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def session(self): #borrow a session, waiting for one to come back if all of them are busy
+        from selenium.common.exceptions import WebDriverException
+        try:
+            session = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                start = len(self.started) < self.size
+                if start:
+                    session = BrowserSession()
+                    self.started.append(session)
+            if not start:
+                session = self.idle.get()
+        try:
+            yield session
+        except WebDriverException: #the browser may be in any state now: replace it rather than hand it to the next day
+            with self.lock:
+                self.started.remove(session)
+            session.close()
+            raise
+        except BaseException:
+            self.idle.put(session)
+            raise
+        self.idle.put(session)
+
+    def close(self):
+        with self.lock:
+            for session in self.started:
+                session.close()
+            self.started = []
+
+class BrowserSession: #one Chrome instance that keeps a tab open on each page it has visited, so pages are loaded once rather than once per day
+    def __init__(self):
+        self.browser = webdriverConfig()
+        self.tabs = {}
+
+    def page(self, url, ready): #switch to the tab showing url, loading it in a new tab on first use; ready locates an element the page must show
+        count('pagesReused' if url in self.tabs else 'pagesLoaded')
+        if url in self.tabs:
+            self.browser.switch_to.window(self.tabs[url])
+        else:
+            if self.tabs:
+                self.browser.execute_script('window.open()')
+                self.browser.switch_to.window(self.browser.window_handles[-1])
+            self.browser.get(url)
+            self.tabs[url] = self.browser.current_window_handle
+        WebDriverWait(self.browser, pageTimeout).until(EC.presence_of_element_located(ready))
+        return self.browser
+
+    def downloadTo(self, dest): #point Chrome's downloads at dest, return a watcher for the files it saves there
+        watcher = DownloadWatcher(dest) #start watching before anything is clicked, so no download can be missed
+        self.browser.execute_cdp_cmd('Page.setDownloadBehavior', {'behavior': 'allow', 'downloadPath': str(dest)})
+        return watcher
+
+    def close(self):
+        from selenium.common.exceptions import WebDriverException
+        try:
+            self.browser.quit()
+        except WebDriverException: #already gone
+            pass
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args): #don't print a line for every fixture request
+        pass
+
+def fixtureServer(root, port=0): #serve recorded CSVs laid out as root/<YYYYMMDD>/<file> so the HTTP backend can run offline
+    handler = partial(_QuietHandler, directory=str(root))
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    baseURL = 'http://127.0.0.1:'+str(server.server_address[1])+'/{date}/{file}'
+    return server, baseURL #pass baseURL to HTTPFetcher; call server.shutdown() when finished
+
+historyHeaders = {'co2': ['Time', 'Imports', 'Natural gas', 'Biogas', 'Biomass', 'Geothermal', 'Coal'], \
+'demand': ['Time', 'Day ahead forecast', 'Hour ahead forecast', 'Current demand'], 'netdemand': ['Time', 'Day ahead net forecast', 'Hour ahead net forecast', 'Net demand'], \
+'renewables': ['Time', 'Solar', 'Wind', 'Geothermal', 'Biomass', 'Biogas', 'Small hydro'], \
+'supply': ['Time', 'Solar', 'Wind', 'Geothermal', 'Biomass', 'Biogas', 'Small hydro', 'Coal', 'Nuclear', 'Natural gas', 'Large hydro', 'Batteries', 'Imports', 'Other']} #header row of each series file under historyURL
+
+def historyFixture(root, day): #write one day of made-up series files in the history layout (one interval per row) where fixtureServer serves them; supply balances demand
+    dest = Path(root) / datetime.strftime(day, '%Y%m%d')
+    os.makedirs(dest, exist_ok=True)
+    t = np.arange(288) / 288
+    sun = np.clip(np.sin((t - 0.25) * 2 * np.pi), 0, None)
+    fuels = {'Solar': 15000 * sun, 'Wind': 3000 + 1000 * np.cos(t * 2 * np.pi), 'Geothermal': np.full(288, 900.), 'Biomass': np.full(288, 300.), 'Biogas': np.full(288, 200.), \
+    'Small hydro': np.full(288, 250.), 'Coal': np.full(288, 5.), 'Nuclear': np.full(288, 2250.), 'Large hydro': np.full(288, 2500.), 'Batteries': 3000 * np.sin(t * 4 * np.pi), \
+    'Imports': np.full(288, 5000.), 'Other': np.full(288, 10.), 'Natural gas': 6000 - 5000 * sun}
+    demand = sum(fuels.values())
+    columns = {'co2': [fuels['Imports'] * 0.43, fuels['Natural gas'] * 0.45, fuels['Biogas'] * 0.3, fuels['Biomass'] * 0.3, fuels['Geothermal'] * 0.05, fuels['Coal'] * 0.9], \
+    'demand': [demand * 1.02, demand * 1.01, demand], 'netdemand': [(demand - fuels['Solar'] - fuels['Wind']) * 1.02, (demand - fuels['Solar'] - fuels['Wind']) * 1.01, demand - fuels['Solar'] - fuels['Wind']], \
+    'renewables': [fuels[h] for h in historyHeaders['renewables'][1:]], 'supply': [fuels[h] for h in historyHeaders['supply'][1:]]}
+    for series in seriesNames:
+        with open(dest / seriesFiles[series], 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(historyHeaders[series])
+            writer.writerows([intervalLabels[i]] + [int(round(v[i])) for v in columns[series]] for i in range(288))
+    return dest
+
+def webdriverConfig(): #configure the webdriver
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless=new')
+        options.add_argument('--window-size=1920,1080') #the charts only render their download menus at desktop widths
+    options.add_argument('log-level=1') #ignore any info warnings
+    prefs = {"download.default_directory" : str(downloads)} 
+    options.add_experimental_option("prefs",prefs)
+    browser = webdriver.Chrome(options=options)
+    return browser
+
+class DownloadWatcher: #wake up as soon as Chrome finishes a download in a directory: inotify events on Linux, short polling elsewhere
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_TO = 0x80 #chrome renames the .crdownload file to its final name when the download completes
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.seen = set(os.listdir(self.directory)) #files already there are never reported
+        self.fd = self.inotify()
+
+    def inotify(self): #file descriptor that becomes readable when a file in the directory is written or renamed, or None if inotify is unavailable
+        if not sys.platform.startswith('linux'):
+            return None
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, str(self.directory).encode(), self.IN_CLOSE_WRITE | self.IN_MOVED_TO) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def completed(self): #path of a new, finished download, or None
+        names = os.listdir(self.directory)
+        if any(n.endswith('.crdownload') for n in names): #incomplete chrome downloads end in .crdownload
+            return None
+        for name in sorted(set(names) - self.seen):
+            path = self.directory / name
+            if not name.endswith('.tmp') and path.stat().st_size > 0:
+                self.seen.add(name)
+                return path
+        return None
+
+    def wait(self, timeout=downloadTimeout): #block until the next download finishes and return its path
+        deadline = time.monotonic() + timeout
+        while True:
+            path = self.completed()
+            if path is not None:
+                return path
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError('No download finished in '+str(self.directory)+' within '+str(timeout)+' seconds')
+            if self.fd is None:
+                time.sleep(min(pollInterval, remaining))
+            elif select.select([self.fd], [], [], remaining)[0]:
+                os.read(self.fd, 4096) #drain the events; the directory is scanned again either way
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+def downloadCurtailment(fetcher, user_initialized): #download curtailment data (updated monthly)
+    print('  Checking for new curtailment data...')
+    soup = BeautifulSoup(fetcher.curtailmentPage(), 'lxml') #use beautifulsoup to parse html
+    postDate = soup.find_all('span', class_='postDate')[0].get_text() #get current postDate from site
+    prevPostDate = getLedger().get('postDate')
+    if postDate==prevPostDate: #compare current and previous postdate
+        print('  Latest curtailment data already downloaded.') #do nothing if they match; we already have the most current file
+        ct_cache = CurtailmentCache.load(curtailCacheFile, postDate)
+        if ct_cache is None: #missing, or built from an older posting
+            ct_cache = CurtailmentCache.build(loadCurtailment(), postDate)
+            ct_cache.save(curtailCacheFile)
+        return ct_cache
+    else: #download new curtailment file if more recent data is available
+        scratch = scratchDir('curtailment') #download into a scratch directory of its own
+        if user_initialized==0: #only notify of new curtailment download if not initiatied by the user
+            print('  New curtailment data available!')
+        print('  Downloading curtailment Excel file...')
+        xlsxFile = fetcher.fetchCurtailment(scratch) #download file
+        print('  Converting Excel file to Parquet...')
+        with stage('convertCurtailment'):
+            ct_latestDate = convertCurtailment(xlsxFile, curtailFile) #find the date of the most recent data available
+        cacheRaw([xlsxFile], datetime.strptime(ct_latestDate, '%Y-%m-%d %H:%M:%S'), 'curtailment')
+        shutil.rmtree(scratch) #once the new file is created and cached, delete the xlsx file
+        for f in os.listdir(curtailments): #remove anything left from older versions (curtailment_data.csv, xlsx files)
+            if curtailments / f != curtailFile:
+                os.remove(curtailments / f)
+        ct_cache = CurtailmentCache.build(loadCurtailment(), postDate)
+        ct_cache.save(curtailCacheFile)
+        getLedger().set(postDate=postDate, ct_latestDate=ct_latestDate)
+        if user_initialized==0: #if this is not the first time the program has been run, fill missing values from previous month in dataFile
+            fillMissingCurtail(ct_cache)  
+        return ct_cache
+
+def convertCurtailment(xlsxFile, outFile, batchSize=50000): #stream the Curtailments sheet into a Parquet file in typed batches, return the date of the last row
+    wb = openpyxl.load_workbook(xlsxFile, read_only=True, data_only=True) #read-only mode streams rows instead of loading the whole workbook
+    rows = wb['Curtailments'].iter_rows(values_only=True)
+    next(rows) #skip the header row
+    tmp = tmpPath(outFile)
+    latest = None
+    with pq.ParquetWriter(tmp, ct_schema) as writer:
+        batch = []
+        for r in rows:
+            if r[0] is None:
+                continue
+            batch.append(r[:5])
+            if len(batch) >= batchSize: #memory stays bounded by the batch size, not the size of the workbook
+                latest = writeCurtailBatch(writer, batch)
+                batch = []
+        if batch:
+            latest = writeCurtailBatch(writer, batch)
+    wb.close()
+    os.replace(tmp, outFile)
+    return datetime.strftime(latest, '%Y-%m-%d %H:%M:%S')
+
+def writeCurtailBatch(writer, batch): #convert a batch of worksheet rows to typed columns and write it, return the last date in the batch
+    dates, hours, intervals, wind, solar = zip(*batch)
+    dates = pd.to_datetime(list(dates)) #cells hold datetimes, but older files may hold text
+    writer.write_table(pa.Table.from_arrays([
+        pa.array(dates.values.astype('datetime64[s]')),
+        pa.array(np.asarray(hours, dtype='float64').astype('uint8')),
+        pa.array(np.asarray(intervals, dtype='float64').astype('uint8')),
+        pa.array(np.asarray(wind, dtype='float32')), #empty cells become NaN
+        pa.array(np.asarray(solar, dtype='float32')),
+    ], schema=ct_schema))
+    return dates[-1].to_pydatetime()
+
+def loadCurtailment(): #load the converted curtailment data
+    if curtailFile.exists():
+        return pd.read_parquet(curtailFile)
+    curtail_read = pd.read_csv(curtailments / 'curtailment_data.csv', dtype=ct_dtypes) #converted by an older version
+    curtail_read.columns = (['date','hour', 'interval','wind_curtail_MW','solar_curtail_MW']) #rename columns
+    curtail_read['date'] = pd.to_datetime(curtail_read['date'], format='%Y-%m-%d %H:%M:%S') #parse all dates at once
+    return curtail_read
+
+class CurtailmentCache: #curtailment keyed by (date, hour, interval), held as one row of 288 intervals per day so any day is a single array lookup
+    def __init__(self, start, wind, solar, postDate):
+        self.start = np.datetime64(start, 'D') #date of the first row
+        self.wind = wind
+        self.solar = solar
+        self.postDate = postDate
+
+    @classmethod
+    def build(cls, curtail_read, postDate): #scatter the curtailment rows into the day x interval arrays
+        days = curtail_read['date'].to_numpy().astype('datetime64[D]')
+        hours = curtail_read['hour'].to_numpy().astype('int64')
+        intervals = curtail_read['interval'].to_numpy().astype('int64')
+        keep = (hours >= 0) & (hours < 24) & (intervals >= 1) & (intervals <= 12) #only keys that can match the data file
+        start = days.min()
+        rows = (days - start).astype('int64')
+        slots = hours * 12 + intervals - 1
+        wind = np.zeros((rows.max() + 1, 288), dtype='float32') #intervals without curtailment are '0'
+        solar = np.zeros((rows.max() + 1, 288), dtype='float32')
+        wind[rows[keep], slots[keep]] = np.nan_to_num(curtail_read['wind_curtail_MW'].to_numpy()[keep])
+        solar[rows[keep], slots[keep]] = np.nan_to_num(curtail_read['solar_curtail_MW'].to_numpy()[keep])
+        return cls(start, wind, solar, postDate)
+
+    @classmethod
+    def load(cls, path, postDate): #return the saved cache, or None if it is missing or was built from a different postDate
+        if not Path(path).exists():
+            return None
+        with np.load(path) as z:
+            if str(z['postDate'])!=postDate:
+                return None
+            return cls(z['start'][()], z['wind'], z['solar'], postDate)
+
+    def save(self, path):
+        tmp = tmpPath(path)
+        with open(tmp, 'wb') as f:
+            np.savez(f, start=np.array(self.start), wind=self.wind, solar=self.solar, postDate=np.array(self.postDate))
+        os.replace(tmp, path)
+
+    def lookup(self, dates, hours, intervals): #return an (n, 2) array of wind and solar curtailment for each (date, hour, interval)
+        rows = (np.asarray(dates).astype('datetime64[D]') - self.start).astype('int64')
+        slots = np.asarray(hours, dtype='int64') * 12 + np.asarray(intervals, dtype='int64') - 1
+        found = (rows >= 0) & (rows < len(self.wind)) & (slots >= 0) & (slots < 288)
+        values = np.zeros((len(rows), 2), dtype='float32')
+        values[found, 0] = self.wind[rows[found], slots[found]]
+        values[found, 1] = self.solar[rows[found], slots[found]]
+        return values
+
+def scratchDir(prefix): #a new scratch directory under downloads, named after the process that owns it so other processes leave it alone
+    return Path(tempfile.mkdtemp(prefix=str(os.getpid())+'@'+socket.gethostname()+'~'+prefix+'-', dir=downloads))
+
+def tmpDelete(f): #delete the temporary files and scratch directories in folder (f) whose process has exited
+    dirPath = Path.cwd() / f
+    for fileName in os.listdir(dirPath):
+        path = dirPath / fileName
+        owner = re.match(r'(\d+)@([^~]+)~', fileName)
+        modified = os.stat(path).st_mtime
+        if owner and owner.group(2)==socket.gethostname():
+            stale = workerGone(owner.group(2)+':'+owner.group(1)+':', modified + 1) #file times lag the clock by a few ms, so allow for that when the pid is ours
+        else: #from another host or an older version: only remove it once nothing can still be using it
+            stale = time.time() - modified > scratchMaxAge
+        if not stale:
+            continue
+        if path.is_dir(): #scratch directory
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+
+def rawPath(sha): #where the cached file with this hash is stored
+    return rawCache / sha[:2] / (sha+('.gz' if rawCompression else ''))
+
+def cacheRaw(paths, day, series=None): #store downloaded files in the raw cache under their hash; identical files are stored once
+    rows = []
+    for path in paths:
+        data = Path(path).read_bytes()
+        sha = hashlib.sha256(data).hexdigest()
+        dest = rawPath(sha)
+        if not dest.exists():
+            os.makedirs(dest.parent, exist_ok=True)
+            tmp = tmpPath(dest)
+            with open(tmp, 'wb') as f:
+                f.write(gzip.compress(data, mtime=0) if rawCompression else data)
+            os.replace(tmp, dest)
+        rows.append((series or seriesOf(path), datetime.strftime(day, '%Y-%m-%d'), sha, Path(path).name, len(data), os.stat(dest).st_size))
+    getLedger().addRaw(rows)
+
+def readRaw(sha): #the original bytes of a cached file
+    path = rawPath(sha)
+    if not path.exists(): #cached under the other compression setting
+        path = path.with_name(sha) if path.suffix=='.gz' else path.with_name(sha+'.gz')
+    data = path.read_bytes()
+    return gzip.decompress(data) if path.suffix=='.gz' else data
+
+def restoreRaw(day, dest): #write the cached files of all five series for day into dest, return their paths or None if any is missing
+    ledger = getLedger()
+    cached = ledger.rawFiles(datetime.strftime(day, '%Y-%m-%d'), seriesNames)
+    if len(cached) < len(seriesNames):
+        return None
+    paths = []
+    for series, (sha, name) in cached.items():
+        path = Path(dest) / name
+        path.write_bytes(readRaw(sha))
+        paths.append(path)
+    ledger.touchRaw([sha for sha, name in cached.values()])
+    return paths
+
+def evictRaw(maxBytes=rawCacheMaxBytes, maxAge=rawCacheMaxAge): #apply the raw cache size and age limits
+    if maxBytes is None and maxAge is None:
+        return
+    keep = getLedger().evictRaw(maxBytes, maxAge)
+    removed = 0
+    for path in rawCache.glob('*/*'):
+        if path.name.split('.')[0] not in keep:
+            path.unlink()
+            removed += 1
+    if removed:
+        print('  '+str(removed)+' file(s) evicted from the raw cache.')
+
+def reprocess(startDate, endDate, outFile=None): #rebuild a date range (MM/DD/YYYY strings) of outFile from the raw cache alone, without contacting CAISO
+    setupDirectories()
+    outFile = Path(outFile) if outFile else outputPath()
+    if storeFormat=='csv' and outFile.exists() and os.stat(outFile).st_size > 0:
+        sys.exit('  '+str(outFile)+' already holds data; reprocess into a new CSV file with --output, or use the Parquet store, where reprocessed days replace the old rows.')
+    if not outFile.exists():
+        createOutput(outFile)
+    ct_cache = cachedCurtailment()
+    startDate, endDate = datetime.strptime(startDate, '%m/%d/%Y'), datetime.strptime(endDate, '%m/%d/%Y')
+    missing = []
+    for i in range((endDate.date() - startDate.date()).days + 1):
+        day = startDate + timedelta(days=i)
+        scratch = scratchDir(datetime.strftime(day, '%Y%m%d'))
+        try:
+            if restoreRaw(day, scratch) is None:
+                missing.append(datetime.strftime(day, '%m/%d/%Y'))
+                continue
+            copyData(day - timedelta(days=1), ct_cache, scratch, outFile)
+        finally:
+            shutil.rmtree(scratch)
+    evictRaw()
+    exportMetrics()
+    print('Reprocessed '+startDate.strftime('%m/%d/%Y')+' to '+endDate.strftime('%m/%d/%Y')+' from the raw cache.')
+    if missing:
+        print('  Not in the raw cache (run --backfill to fetch them): '+', '.join(missing))
+
+def cachedCurtailment(): #the curtailment cache, rebuilt from the newest cached workbook if the converted file is gone
+    ledger = getLedger()
+    postDate = ledger.get('postDate')
+    ct_cache = CurtailmentCache.load(curtailCacheFile, postDate)
+    if ct_cache is not None:
+        return ct_cache
+    if not curtailFile.exists() and not (curtailments / 'curtailment_data.csv').exists():
+        latest = ledger.latestRaw('curtailment')
+        if latest is None:
+            sys.exit('  No curtailment data available; run the script once to download it.')
+        scratch = scratchDir('curtailment')
+        xlsxFile = scratch / latest[2]
+        xlsxFile.write_bytes(readRaw(latest[1]))
+        ledger.set(ct_latestDate=convertCurtailment(xlsxFile, curtailFile))
+        shutil.rmtree(scratch)
+    ct_cache = CurtailmentCache.build(loadCurtailment(), postDate)
+    ct_cache.save(curtailCacheFile)
+    return ct_cache
+
+def downloadDemand(session, day, watcher): #download demand and net demand data, which share a page
+    browser = session.page(demandURL, (By.ID, 'demand'))
+    print('  Downloading demand data...')
+    paths = [downloadChart(browser, day, watcher, 'demand', 'demand-date', ('dropdownMenu1', 0), 'downloadDemandCSV')]
+    print('  Downloading net demand data...')
+    paths.append(downloadChart(browser, day, watcher, 'netDemand', 'net-demand-date', ('dropdownMenu1', 2), 'downloadNetDemandCSV'))
+    return paths
+
+def downloadSupply(session, day, watcher): #download supply and renewables data, which share a page
+    browser = session.page(supplyURL, (By.ID, 'supplyTrend'))
+    print('  Downloading supply data...')
+    paths = [downloadChart(browser, day, watcher, 'supplyTrend', 'supply-trend-date', ('dropdownMenuSupply', 0), 'downloadSupplyCSV')]
+    print('  Downloading renewables data...')
+    paths.append(downloadChart(browser, day, watcher, 'renewables', 'renewables-date', ('dropdownMenuRenewables', 0), 'downloadRenewablesCSV'))
+    #storage data is not collected: downloadChart(browser, day, watcher, 'batteries', 'batteries-date', ('dropdownMenuBatteries', 0), 'downloadBatteriesCSV')
+    return paths
+
+def downloadEmissions(session, day, watcher): #download emissions data
+    browser = session.page(emissionsURL, (By.ID, 'co2Breakdown'))
+    print('  Downloading emissions data...')
+    return [downloadChart(browser, day, watcher, 'co2Breakdown', 'co2-breakdown-date', ('dropdownMenuCO2Breakdown', 0), 'downloadCO2BreakdownCSV')]
+
+def downloadChart(browser, day, watcher, chart, dateClass, menu, button): #select day in one chart's datepicker and download its CSV, return the saved path
+    with stage('download.'+chart):
+        return _downloadChart(browser, day, watcher, chart, dateClass, menu, button)
+
+def _downloadChart(browser, day, watcher, chart, dateClass, menu, button):
+    wait = WebDriverWait(browser, pageTimeout)
+    ActionChains(browser).move_to_element(browser.find_element(By.ID, chart)).perform()
+    wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, '.form-control.date.'+dateClass))).click() #click on date dropdown
+    pickDate(browser, day)
+    wait.until(EC.invisibility_of_element_located((By.CSS_SELECTOR, '.datepicker-dropdown'))) #the chart reloads once the picker closes
+    wait.until(lambda b: b.find_elements(By.ID, menu[0])[menu[1]].is_enabled())
+    browser.find_elements(By.ID, menu[0])[menu[1]].click() #click on download dropdown
+    wait.until(EC.element_to_be_clickable((By.ID, button))).click() #download CSV file
+    start = time.perf_counter()
+    path = watcher.wait() #wait for the download to finish
+    count('waitSeconds', time.perf_counter() - start)
+    return path
+
+def pickDate(browser, day): #select day in the open datepicker, moving straight to its month in a single script call
+    from selenium.common.exceptions import TimeoutException
+    wait = WebDriverWait(browser, pageTimeout)
+    picker = wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, '.datepicker-dropdown .datepicker-days')))
+    shown = int(picker.find_element(By.CSS_SELECTOR, 'td.day:not(.old):not(.new)').get_attribute('data-date')) #a day of the month on display
+    shown = datetime.fromtimestamp(shown / 1000, timezone.utc)
+    months = (shown.year - day.year) * 12 + shown.month - day.month
+    browser.execute_script("""
+        var picker = arguments[0], button = picker.querySelector(arguments[1] > 0 ? '.prev' : '.next');
+        for (var i = 0; i < Math.abs(arguments[1]) && !button.classList.contains('disabled') && button.style.visibility != 'hidden'; i++) button.click();
+    """, picker, months)
+    try:
+        wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, ".datepicker-dropdown [data-date='{}']".format(dataDateFor(day - timedelta(days=1)))))).click() #select date
+    except TimeoutException: #the picker ran out of months
+        raise ValueError('Data for '+datetime.strftime(day, '%m/%d/%Y')+' is not available to download; try a more recent date.')
+
+def identifySeries(path): #work out which series a downloaded file holds, from its name or else from its contents
+    path = Path(path)
+    for series, pattern in seriesPatterns.items():
+        if pattern.search(path.stem):
+            return series
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = [r for r in csv.reader(f) if r and r[0].strip()]
+    if rows and rows[0][0].strip().lower()=='time': #history files name each series in the header row
+        labels = ' '.join(rows[0][1:]).lower()
+    else: #first column holds the name of each row's series
+        labels = ' '.join(r[0] for r in rows[1:]).lower()
+    if 'nuclear' in labels: #supply lists nuclear in both the chart and the history layout
+        return 'supply'
+    elif 'solar' in labels:
+        return 'renewables'
+    elif 'ahead' in labels: #demand and net demand both have day and hour ahead forecasts
+        return 'netdemand' if 'net' in labels else 'demand'
+    elif 'coal' in labels:
+        return 'co2'
+    raise ValueError('Could not identify the series in '+str(path))
+
+def seriesOf(path): #the series of a downloaded file, or its name if it can't be identified (copyData then quarantines the day)
+    try:
+        return identifySeries(path)
+    except ValueError:
+        return Path(path).name
+
+def matchSeries(src): #map each series to its file in src
+    files = {}
+    for f in os.listdir(src):
+        series = identifySeries(Path(src) / f)
+        if series in files:
+            raise ValueError('More than one '+series+' file in '+str(src))
+        files[series] = Path(src) / f
+    missing = [series for series in seriesNames if series not in files]
+    if missing:
+        raise ValueError('Missing '+', '.join(missing)+' data in '+str(src))
+    return files
+
+def dataQuality(values, slots, day): #check one parsed day in a single vectorized pass and save a JSON report; no files are read
+    report = {'date': datetime.strftime(day, '%Y-%m-%d'), 'issues': {}}
+    issues = report['issues']
+    names = list(values)
+    block = np.vstack([values[col] for col in names]) #one row per column, one column per interval
+    missing = np.isnan(block).sum(axis=1)
+    if (missing==288).any():
+        issues['emptySeries'] = [names[i] for i in np.flatnonzero(missing==288)]
+    if ((missing > 0) & (missing < 288)).any(): #check for missing values (NaN)
+        issues['missingValues'] = {names[i]: int(missing[i]) for i in np.flatnonzero((missing > 0) & (missing < 288))}
+    limits = np.array([(np.iinfo(dataFile_dtypes[col]).min, np.iinfo(dataFile_dtypes[col]).max) if 'int' in dataFile_dtypes[col] else (-np.inf, np.inf) for col in names])
+    outOfRange = ((block < limits[:, :1]) | (block > limits[:, 1:])).sum(axis=1) #values that would overflow the column's dtype (e.g. coal_MW above 255)
+    if outOfRange.any():
+        issues['outOfRange'] = {names[i]: int(outOfRange[i]) for i in np.flatnonzero(outOfRange)}
+    nonMonotonic = [series for series in seriesNames if (np.diff(slots[series]) <= 0).any()]
+    if nonMonotonic:
+        issues['nonMonotonic'] = nonMonotonic
+    incomplete = {series: int(len(np.unique(slots[series]))) for series in seriesNames if len(np.unique(slots[series])) < 288} #check for incomplete timeseries (fewer than 288 5-min periods)
+    if incomplete:
+        issues['incompleteTimeseries'] = incomplete
+    supply = np.nansum(np.vstack([values[col] for col in supplyColumns]), axis=0)
+    demand = values['demand_actual']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gap = np.abs(supply - demand) / demand
+    unbalanced = np.isfinite(gap) & (gap > supplyTolerance)
+    if unbalanced.any():
+        issues['unbalanced'] = {'intervals': int(unbalanced.sum()), 'maxRelativeGap': round(float(np.nanmax(gap[np.isfinite(gap)])), 4)}
+    nonexistent = timestampFrame(day, intervalLabels)['timestamp'].isna().to_numpy() #intervals in the hour skipped when daylight saving time starts
+    if nonexistent.any() and (~np.isnan(block[:, nonexistent])).any():
+        issues['nonexistentTimes'] = int((~np.isnan(block[:, nonexistent])).any(axis=0).sum()) #intervals holding data but no timestamp
+    pst = pytz.timezone('America/Los_Angeles')
+    midnight = pst.localize(datetime(day.year, day.month, day.day))
+    report['hoursInDay'] = round((pst.localize(datetime(day.year, day.month, day.day) + timedelta(days=1)) - midnight).total_seconds() / 3600) #23 or 25 on daylight saving days
+    report['quarantined'] = any(check in issues for check in quarantineChecks)
+    os.makedirs(qualityDir, exist_ok=True)
+    with open(qualityDir / (report['date']+'.json'), 'w') as f:
+        json.dump(report, f, indent=1)
+    if not issues:
+        print('  Data quality OK')
+    else:
+        print('  DATA QUALITY ISSUES DETECTED:')
+        for check, detail in issues.items():
+            print('  > '+check+': '+str(detail))
+        if report['hoursInDay']!=24:
+            print('  > (daylight saving day with '+str(report['hoursInDay'])+' hours)')
+    return report
+
+def fillMissingCurtail(ct_cache): #since curtailment data is published with a month lag, this function goes back and fills in the dataFile once the data becomes available
+    with stage('fillCurtail'), outputLock(outputPath()):
+        _fillMissingCurtail(ct_cache)
+
+def _fillMissingCurtail(ct_cache):
+    print("  Filling in previous month's curtailment data...")
+    ct_latestDate_dt = datetime.strptime(getLedger().get('ct_latestDate'), '%Y-%m-%d %H:%M:%S')
+    pending, offset = pendingCurtail()
+    if storeFormat=='parquet':
+        fillMissingCurtailStore(ct_cache, ct_latestDate_dt, pending)
+    elif storeFormat=='mmap':
+        fillMissingCurtailMmap(ct_cache, ct_latestDate_dt, pending)
+    elif offset is not None:
+        fillMissingCurtailCSV(ct_cache, ct_latestDate_dt, offset)
+    else: #no index yet (data file written by an older version): rewrite the whole file once, then track the placeholders from here on
+        df_dataFile = pd.read_csv(dataFile, dtype=csvDtypes())
+        nulls = df_dataFile[['wind_curtail_MW','solar_curtail_MW']].isnull().any(axis=1) #figure out which rows contain NaNs (which should be only missing curtailment data)
+        if not nulls.any():
+            savePending([], None)
+            return
+        fill = nulls & (pd.to_datetime(df_dataFile['date'], format='%m/%d/%Y') <= ct_latestDate_dt) #only rows covered by the curtailment file
+        fillCurtail(df_dataFile, fill, ct_cache)
+        updateRollups(df_dataFile[df_dataFile['date'].isin(df_dataFile.loc[fill, 'date'])])
+        nulls = nulls & ~fill
+        head = nulls.idxmax() if nulls.any() else len(df_dataFile) #rows from here on still hold placeholders
+        tmp = dataFile.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            df_dataFile.iloc[:head].to_csv(f, header=True, index=False)
+            offset = f.tell()
+            df_dataFile.iloc[head:].to_csv(f, header=False, index=False)
+        os.replace(tmp, dataFile) #swap in the rewritten file only once it is complete
+        remaining = df_dataFile.loc[nulls, 'date'].unique().tolist()
+        savePending(remaining, offset if remaining else None)
+
+def pendingCurtail(): #dates (MM/DD/YYYY) that still hold curtailment placeholders (None if not tracked), and the byte offset in dataFile where their rows start
+    ledger = getLedger()
+    offset = ledger.get('pendingOffset')
+    if not ledger.get('curtailTracked'):
+        return None, offset
+    return [datetime.strftime(datetime.strptime(d, '%Y-%m-%d'), '%m/%d/%Y') for d in ledger.curtailPending(outputPath())], offset
+
+def savePending(dates, offset): #dates is None when placeholders are not being tracked
+    isoDates = [datetime.strftime(datetime.strptime(d, '%m/%d/%Y'), '%Y-%m-%d') for d in dates or []]
+    getLedger().setCurtailPending(outputPath(), isoDates, {'curtailTracked': dates is not None, 'pendingOffset': offset})
+
+def fillCurtail(df, fill, ct_cache): #overwrite the curtailment placeholders in the rows selected by fill
+    rows = df.loc[fill]
+    dates = rows['date'] if pd.api.types.is_datetime64_any_dtype(rows['date']) else pd.to_datetime(rows['date'], format='%m/%d/%Y')
+    df.loc[fill, ['wind_curtail_MW', 'solar_curtail_MW']] = ct_cache.lookup(dates.to_numpy(), rows['hour'].to_numpy(), rows['interval'].to_numpy())
+
+def fillMissingCurtailStore(ct_cache, ct_latestDate_dt, pending, store=storeDir): #rewrite only the partitions that hold placeholders
+    if pending is None: #no index yet: look for placeholders in every partition, reading only the curtailment columns
+        paths = sorted(Path(store).glob('*/*.parquet'))
+    else:
+        months = sorted({(d.year, d.month) for d in (datetime.strptime(x, '%m/%d/%Y') for x in pending) if d <= ct_latestDate_dt})
+        paths = [partitionPath(year, month, store) for year, month in months]
+    remaining = set(x for x in pending if datetime.strptime(x, '%m/%d/%Y') > ct_latestDate_dt) if pending is not None else set()
+    for path in paths:
+        if not path.exists():
+            continue
+        nulls = pd.read_parquet(path, columns=['wind_curtail_MW', 'solar_curtail_MW']).isnull().any(axis=1)
+        if not nulls.any():
+            continue
+        part = pd.read_parquet(path)
+        fill = nulls & (part['date'] <= ct_latestDate_dt) #only rows covered by the curtailment file
+        remaining.update(part.loc[nulls & ~fill, 'date'].dt.strftime('%m/%d/%Y'))
+        if fill.any():
+            fillCurtail(part, fill, ct_cache)
+            writeParquet(part, path)
+            updateRollups(part[part['date'].isin(part.loc[fill, 'date'])]) #the filled days, in full
+    savePending(sorted(remaining, key=lambda x: datetime.strptime(x, '%m/%d/%Y')), None)
+
+def fillMissingCurtailMmap(ct_cache, ct_latestDate_dt, pending, store=mmapDir): #overwrite the curtailment columns of the pending days in place
+    store = MmapStore(store)
+    if pending is None: #no index yet: find the written days whose curtailment is missing
+        present, wind = store.column('present'), store.column('wind_curtail_MW')
+        gaps = np.flatnonzero((present[:len(wind)]==1) & np.isnan(wind[:len(present)]))
+        pending = sorted({datetime.strftime(mmapEpoch + timedelta(days=int(i // 288)), '%m/%d/%Y') for i in gaps}, key=lambda x: datetime.strptime(x, '%m/%d/%Y'))
+    fill = [d for d in pending if datetime.strptime(d, '%m/%d/%Y') <= ct_latestDate_dt]
+    if fill:
+        slots = np.arange(288)
+        days = pd.DataFrame({'date': np.repeat(pd.to_datetime(fill, format='%m/%d/%Y').to_numpy(), 288), 'hour': np.tile(slots // 12, len(fill)), 'interval': np.tile(slots % 12 + 1, len(fill))})
+        values = ct_cache.lookup(days['date'].to_numpy(), days['hour'].to_numpy(), days['interval'].to_numpy())
+        days['wind_curtail_MW'], days['solar_curtail_MW'] = values[:, 0], values[:, 1]
+        for date, day in days.groupby('date'):
+            store.write(day) #the other columns of these intervals are left as they are
+        filled = store.frame(days['date'].min(), days['date'].max())
+        updateRollups(filled[filled['date'].isin(days['date'].unique())])
+    savePending([d for d in pending if d not in fill], None)
+
+def fillMissingCurtailCSV(ct_cache, ct_latestDate_dt, offset): #rewrite only the tail of dataFile that holds placeholders
+    recoverCurtailJournal()
+    with open(dataFile, 'rb') as f:
+        header = f.readline().decode().strip().split(',')
+        f.seek(offset)
+        tail = pd.read_csv(f, names=header, dtype=csvDtypes())
+    nulls = tail[['wind_curtail_MW','solar_curtail_MW']].isnull().any(axis=1)
+    fill = nulls & (pd.to_datetime(tail['date'], format='%m/%d/%Y') <= ct_latestDate_dt)
+    if not fill.any():
+        return
+    fillCurtail(tail, fill, ct_cache)
+    nulls = nulls & ~fill
+    head = nulls.idxmax() if nulls.any() else len(tail)
+    filled = tail.iloc[:head].to_csv(header=False, index=False).encode()
+    rest = tail.iloc[head:].to_csv(header=False, index=False).encode()
+    journal = dataFile.with_name(dataFile.name+'.'+str(offset)+'.tail') #the new tail and where it goes, kept until it has been written
+    with open(journal.with_suffix('.tmp'), 'wb') as f:
+        f.write(filled + rest)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(journal.with_suffix('.tmp'), journal)
+    recoverCurtailJournal()
+    updateRollups(tail[tail['date'].isin(tail.loc[fill, 'date'])]) #the filled days, in full
+    remaining = tail.loc[nulls, 'date'].unique().tolist()
+    savePending(remaining, offset + len(filled) if remaining else None)
+
+def recoverCurtailJournal(): #finish writing any new dataFile tail left behind by an interrupted curtailment fill
+    for journal in dataFile.parent.glob(dataFile.name+'.*.tail'):
+        offset = int(journal.name.split('.')[-2])
+        with open(dataFile, 'r+b') as f:
+            f.truncate(offset)
+            f.seek(offset)
+            with open(journal, 'rb') as j:
+                shutil.copyfileobj(j, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.remove(journal)
+
+def timestampFrame(day, times): #build the date/time columns for one day from its 'HH:MM' interval labels, without any per-row parsing
+    offsets = pd.to_timedelta(pd.Series(times, dtype=str).str.strip() + ':00').to_numpy() #time of day of each interval
+    minutes = (offsets // np.timedelta64(1, 'm')).astype('int64')
+    local = np.datetime64(datetime.strftime(day, '%Y-%m-%d'), 'ns') + offsets
+    df_ts = pd.DataFrame({
+        'date': datetime.strftime(day, '%m/%d/%Y'),
+        'month': np.full(len(minutes), day.month, dtype='uint8'),
+        'day': np.full(len(minutes), day.day, dtype='uint8'),
+        'weekday': np.full(len(minutes), int(datetime.strftime(day, '%w')), dtype='uint8'), #0=sun ... 6=sat
+        'hour': (minutes // 60).astype('uint8'),
+        'interval': ((minutes % 60) // 5 + 1).astype('uint8'), #12 intervals per hour
+    })
+    df_ts['timestamp'] = localTimestamps(local)
+    return df_ts
+
+def localTimestamps(local): #Pacific timestamps of naive local interval times
+    #a day always has 288 intervals, so the repeated hour when daylight saving time ends is read as daylight time and the skipped hour when it starts has no timestamp (NaT), which keeps the column unique and sorted
+    return pd.DatetimeIndex(local).tz_localize('America/Los_Angeles', ambiguous=np.ones(len(local), dtype=bool), nonexistent='NaT')
+
+def parseDay(files, day): #read the five wide daily CSVs straight into typed columns and assemble the 288-row day record in one step
+    return assembleDay(readDay(files)[0], day)
+
+def readDay(files): #read the five wide daily CSVs into float arrays of 288 intervals, plus the interval positions found in each file
+    values = {}
+    slots = {}
+    for series in seriesNames:
+        block = readSeries(files[series])
+        found = intervalSlots(block.columns)
+        keep = found >= 0 #ignore anything after 23:55
+        slots[series] = found[keep]
+        data = pd.to_numeric(block.to_numpy()[:, keep].ravel(), errors='coerce').reshape(len(block), -1).astype('float64')
+        rows = {}
+        for label, row in zip(block.index, data):
+            if pd.isna(label) or not str(label).strip():
+                continue
+            col = rowColumn(series, label, files[series])
+            if col is not None:
+                rows.setdefault(col, []).append(row)
+        for col in seriesColumns[series]:
+            values[col] = np.full(288, np.nan) #intervals missing from the file stay empty
+            if col in rows:
+                stacked = np.vstack(rows[col])
+                values[col][slots[series]] = np.where(np.isnan(stacked).all(axis=0), np.nan, np.nansum(stacked, axis=0))
+    return values, slots
+
+def readSeries(path): #a series file as one row per series and one column per interval, from either layout
+    block = pd.read_csv(path, index_col=0, encoding='utf-8-sig')
+    if str(block.index.name).strip().lower()=='time': #history files list one interval per row
+        block = block.T.rename_axis(columns=None)
+    return block
+
+def rowColumn(series, label, path): #the data file column that a row of a series file feeds, matched on its label so the chart and history layouts both work
+    name = ' '.join(re.sub(r'[^a-z0-9]+', ' ', str(label).lower()).split())
+    for pattern, col in seriesRows[series]:
+        if re.search(pattern, name):
+            return col
+    raise ValueError('Unknown '+series+' row "'+str(label)+'" in '+str(path))
+
+def assembleDay(values, day): #cast the arrays from readDay to dataFile_dtypes and build the day record
+    columns = dict(timestampFrame(day, intervalLabels).items())
+    columns['5min_ending'] = intervalLabels
+    columns['wind_curtail_MW'] = np.full(288, np.nan, dtype='float32') #filled in by copyData
+    columns['solar_curtail_MW'] = np.full(288, np.nan, dtype='float32')
+    for col, v in values.items():
+        columns[col] = typedColumn(v, dataFile_dtypes[col])
+    return pd.DataFrame(columns, columns=dataColumns)
+
+def intervalSlots(labels): #position (0-287) of each 'HH:MM' column label in the day, -1 for anything else
+    offsets = pd.to_timedelta(pd.Index(labels).astype(str).str.strip() + ':00', errors='coerce')
+    slots = (offsets // pd.Timedelta(minutes=5)).to_numpy(dtype='float64')
+    slots[np.isnan(slots) | (slots < 0) | (slots >= 288)] = -1
+    return slots.astype('int64')
+
+def parseDayMerge(files, day): #the transpose-and-merge transform that parseDay replaced, kept for benchmarkParse
+    '''
+    #storage data
+    storage_read = pd.read_csv(files['storage'])
+    df_storage = storage_read.transpose()
+    df_storage.columns = df_storage.iloc[0] #change first row to header
+    df_storage.drop(df_storage.index[0], inplace=True) #drop old header
+    df_storage.drop(df_storage.index[288:], inplace=True) #drop extra rows
+    df_storage.reset_index(inplace=True, drop=True)
+    df_storage.columns = ['battery_MW']
+    '''
+
+    #emissions data
+    co2_read = readSeries(files['co2']).reset_index()
+    df_co2 = co2_read.transpose() #transpose data
+    df_co2.columns = df_co2.iloc[0] #change first row to header and drop
+    df_co2.drop(df_co2.index[0], inplace=True) #drop old header
+    df_co2.drop(df_co2.index[288:], inplace=True) #drop extra rows
+    df_co2.reset_index(inplace=True, drop=True) #reset the index
+    df_co2 = labelColumns(df_co2, 'co2', files['co2'])
+    
+    #demand data
+    demand_read = readSeries(files['demand']).reset_index()
+    df_demand = demand_read.transpose() #transpose data
+    df_demand.columns = df_demand.iloc[0] #change first row to header and drop
+    df_demand.drop(df_demand.index[0], inplace=True) #drop old header
+    df_demand.drop(df_demand.index[288:], inplace=True) #drop extra rows
+    df_demand = labelColumns(df_demand, 'demand', files['demand'])
+    df_demand.reset_index(inplace=True) #reset the index
+    df_demand.rename(columns={'index': '5min_ending'}, inplace=True)
+    
+    #net demand data
+    netdemand_read = readSeries(files['netdemand']).reset_index()
+    df_netdemand = netdemand_read.transpose() #transpose data
+    df_netdemand.columns = df_netdemand.iloc[0] #change first row to header and drop
+    df_netdemand.drop(df_netdemand.index[0], inplace=True) #drop old header
+    df_netdemand.drop(df_netdemand.index[288:], inplace=True) #drop extra rows
+    df_netdemand.reset_index(inplace=True, drop=True) #reset the index
+    df_netdemand = labelColumns(df_netdemand, 'netdemand', files['netdemand'])
+    
+    #renewables data
+    renew_read = readSeries(files['renewables']).reset_index()
+    df_renew = renew_read.transpose()
+    df_renew.columns = df_renew.iloc[0] #change first row to header
+    df_renew.drop(df_renew.index[0], inplace=True) #drop old header
+    df_renew.drop(df_renew.index[288:], inplace=True) #drop extra rows
+    df_renew.reset_index(inplace=True, drop=True)
+    df_renew = labelColumns(df_renew, 'renewables', files['renewables'])
+    
+    #supply data
+    supply_read = readSeries(files['supply']).reset_index()
+    df_supply = supply_read.transpose() #transpose data
+    df_supply.columns = df_supply.iloc[0] #change first row to header and drop
+    df_supply.drop(df_supply.index[0], inplace=True) #drop old header
+    df_supply.drop(df_supply.index[288:], inplace=True) #drop extra rows
+    df_supply.reset_index(inplace=True, drop=True) #reset the index
+    df_supply = labelColumns(df_supply, 'supply', files['supply'])
+    df_supply = df_supply[['battery_MW','renewable_MW','natgas_MW','lg_hydro_MW','imports_MW','nuclear_MW','coal_MW','other_MW']] #reorder the columns
+    
+    df_ts = timestampFrame(day, df_demand['5min_ending'])
+    df_curtail = pd.DataFrame(np.nan, index=pd.RangeIndex(start=0,stop=288), columns=['wind_curtail_MW','solar_curtail_MW'])
+    data_frames = [df_ts, df_demand, df_netdemand, df_curtail, df_renew, df_supply, df_co2] #list of dataframes to merge
+    return reduce(lambda left,right: pd.merge(left,right,left_index=True,right_index=True), data_frames) #merge the dateframes
+
+def labelColumns(df, series, path): #name the columns of a transposed series file by their row labels, summing those that share a column
+    cols = [rowColumn(series, c, path) for c in df.columns]
+    return df.T.groupby(cols, sort=False).sum(min_count=1).T.reindex(columns=seriesColumns[series])
+
+def benchmarkParse(src, day, repeat=20): #time parseDay against parseDayMerge on one day of downloaded files
+    files = matchSeries(src)
+    for name, func in [('transpose/merge', parseDayMerge), ('single pass', parseDay)]:
+        func(files, day) #warm up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func(files, day)
+        print('  '+name+': '+str(round((time.perf_counter() - start) / repeat * 1000, 2))+' ms per day')
+
+def live(fetcher=None): #keep the main output current to the latest 5-minute interval until interrupted; today's rows are provisional until the final day replaces them
+    if storeFormat=='csv':
+        sys.exit('  --live needs the parquet or mmap format, where the final day can replace its provisional rows in place.')
+    setupDirectories()
+    if not outputPath().exists():
+        sys.exit('  Run the script once without --live to choose the start date of the output.')
+    pacific = pytz.timezone('America/Los_Angeles')
+    fetcher = fetcher or HTTPFetcher() #one session, kept warm between polls
+    ct_cache = downloadCurtailment(fetcher, 0)
+    lastRun = {task: time.time() for task in liveIdle}
+    appended = {} #intervals of each provisional day already in the output
+    print('  Live mode: polling every '+str(livePoll)+' seconds (Ctrl+C to stop)...')
+    try:
+        while True:
+            now = datetime.now(pacific)
+            today = datetime(now.year, now.month, now.day)
+            latestDate_dt = checkLatest()[0]
+            if latestDate_dt.date() < (today - timedelta(days=1)).date(): #final files of the days before today replace their provisional rows
+                backfill(fetcher, latestDate_dt + timedelta(days=1), today - timedelta(days=1), ct_cache)
+            try:
+                with stage('live'):
+                    pollToday(fetcher, today, appended)
+            except (requests.RequestException, OSError, ValueError) as e: #try again at the next interval (ValueError: files that can't be parsed yet)
+                count('fetchErrors')
+                print('  Live update failed ('+str(e)+'), retrying at the next interval.')
+            wake = (math.floor(time.time() / livePoll) + 1) * livePoll + liveLag
+            for task, every in liveIdle.items(): #use the wait for work that would otherwise delay a poll
+                if time.time() - lastRun[task] >= every and wake - time.time() >= liveIdleMin:
+                    if task=='curtailment':
+                        ct_cache = downloadCurtailment(fetcher, 0)
+                    elif task=='evictRaw':
+                        evictRaw()
+                    elif task=='metrics':
+                        writePrometheus()
+                    lastRun[task] = time.time()
+            time.sleep(max(wake - time.time(), 0))
+    except KeyboardInterrupt:
+        print('  Live mode stopped.')
+    finally:
+        fetcher.close()
+        exportMetrics()
+
+def pollToday(fetcher, today, appended): #append the intervals of today that have arrived since the last poll
+    dest = scratchDir(datetime.strftime(today, '%Y%m%d')+'-live')
+    try:
+        fetcher.fetchDay(today, dest, baseURL=fetcher.liveURL, conditional=True)
+        values, slots = readDay(matchSeries(dest))
+        n = readyIntervals(values)
+        previous = appended.get(today, 0)
+        if n <= previous: #nothing new since the last poll
+            return
+        df = assembleDay(values, today).iloc[:n] #earlier intervals are written again, so any revision CAISO made to them is picked up
+        with outputLock(outputPath()):
+            appendData(df, outputPath())
+            updateRollups(df)
+            provisional = sorted(set(getLedger().get('provisional', [])) | {datetime.strftime(today, '%Y-%m-%d')})
+            getLedger().finish(outputPath(), today, 'provisional', rows=n, state={'provisional': provisional}) #days with provisional rows, until their final files are committed or quarantined
+        appended.clear()
+        appended[today] = n
+        count('provisionalRows', n - previous)
+        logMetrics('live', date=datetime.strftime(today, '%Y-%m-%d'), intervals=n)
+        print('  '+str(n - previous)+' new interval(s) for '+datetime.strftime(today, '%m/%d/%Y')+' appended, through '+intervalLabels[n - 1]+'.')
+    finally:
+        shutil.rmtree(dest, ignore_errors=True)
+
+def readyIntervals(values): #number of intervals from midnight on for which every series has been published
+    ready = np.ones(288, dtype=bool)
+    for series in seriesNames:
+        cols = [c for c in seriesColumns[series] if c not in forecastColumns]
+        ready &= ~np.isnan(np.vstack([values[c] for c in cols])).all(axis=0)
+    return int(ready.argmin()) if not ready.all() else 288
+
+def recordFixtures(root, startDate, endDate): #save the series files for a date range (MM/DD/YYYY strings) and the curtailment workbook in the layout fixtureServer serves
+    root = Path(root)
+    fetcher = HTTPFetcher()
+    startDate, endDate = datetime.strptime(startDate, '%m/%d/%Y'), datetime.strptime(endDate, '%m/%d/%Y')
+    for i in range((endDate.date() - startDate.date()).days + 1):
+        day = startDate + timedelta(days=i)
+        os.makedirs(root / datetime.strftime(day, '%Y%m%d'), exist_ok=True)
+        for series in seriesNames:
+            (root / datetime.strftime(day, '%Y%m%d') / seriesFiles[series]).write_bytes(fetcher.fetchRaw(series, day))
+    xlsxFile = fetcher.fetchCurtailment(root)
+    os.replace(xlsxFile, root / 'curtailment.xlsx')
+    fetcher.close()
+    print('  Fixtures for '+str(i + 1)+' day(s) saved in '+str(root))
+
+def benchmark(fixtures, sizes=benchmarkSizes, baseline=benchmarkBaseline, save=False): #replay the fixtures as histories of each size, each in a fresh process and workspace, and compare with the baseline
+    fixtures = Path(fixtures).resolve()
+    old = json.loads(Path(baseline).read_text()) if Path(baseline).exists() else {}
+    results = {}
+    for name, days in sizes.items():
+        workspace = tempfile.mkdtemp(prefix='benchmark-')
+        resultFile = Path(workspace) / 'result.json'
+        try:
+            subprocess.run([sys.executable, str(Path(__file__).resolve().parents[1] / 'CAISO_operations.py'), '--format', storeFormat, '--benchmark-run', str(fixtures), str(days), str(resultFile)],
+                cwd=workspace, stdout=subprocess.DEVNULL, check=True) #a fresh process per size, so peak memory is that of the size alone
+            results[name] = json.loads(resultFile.read_text())
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+        printBenchmark(name, results[name], old.get(storeFormat, {}).get(name))
+    if save:
+        old[storeFormat] = results
+        Path(baseline).write_text(json.dumps(old, indent=1))
+        print('  Baseline saved to '+str(baseline))
+    return results
+
+def printBenchmark(name, result, base): #one block of the benchmark report; deltas are relative to base, if there is one
+    def delta(key, stage=None):
+        if not base:
+            return ''
+        new, ref = (result['stages'].get(stage), base['stages'].get(stage)) if stage else (result[key], base[key])
+        if not new or not ref:
+            return ''
+        return ' ({:+.1f}%)'.format((new / ref - 1) * 100)
+    print('  '+name+': '+str(result['days'])+' days in '+str(round(result['seconds'], 2))+' s, '+str(round(result['daysPerSecond'], 2))+' days/s'+delta('daysPerSecond')
+        +(', peak '+str(round(result['peakMB'], 1))+' MB'+delta('peakMB') if result['peakMB'] is not None else ''))
+    for stageName, seconds in sorted(result['stages'].items()):
+        print('    '+stageName.ljust(20)+str(round(seconds, 3)).rjust(9)+' s  '+str(round(seconds / result['days'] * 1000, 2)).rjust(9)+' ms/day'+delta(None, stageName))
+
+def benchmarkRun(fixtures, days, resultFile): #ingest days of replayed fixtures into the current (empty) working directory and save the stage timings
+    setupDirectories()
+    recorded = sorted(d.name for d in Path(fixtures).iterdir() if d.is_dir() and re.fullmatch(r'\d{8}', d.name))
+    if not recorded or not (Path(fixtures) / 'curtailment.xlsx').exists():
+        sys.exit('  '+str(fixtures)+' needs <YYYYMMDD> directories of series files and a curtailment.xlsx; see --record-fixtures.')
+    startDate = datetime.strptime(recorded[0], '%Y%m%d')
+    replay = Path.cwd() / 'replay' #the recorded days repeated to cover the history
+    for i in range(days):
+        day = startDate + timedelta(days=i)
+        os.makedirs(replay / datetime.strftime(day, '%Y%m%d'))
+        for f in (Path(fixtures) / recorded[i % len(recorded)]).iterdir():
+            shutil.copyfile(f, replay / datetime.strftime(day, '%Y%m%d') / f.name)
+    server, baseURL = fixtureServer(replay)
+    fetcher = HTTPFetcher(baseURL, rate=1e6) #no rate limit against the local server
+    endDate = startDate + timedelta(days=days - 1)
+    start = time.perf_counter()
+    with stage('convertCurtailment'):
+        convertCurtailment(Path(fixtures) / 'curtailment.xlsx', curtailFile)
+    ct_cache = CurtailmentCache.build(loadCurtailment(), 'benchmark')
+    ct_latestDate = startDate + timedelta(days=(days + 1) // 2 - 1) #curtailment is published with a lag: the first half of the days find theirs...
+    getLedger().set(latestDate=datetime.strftime(startDate - timedelta(days=1), '%m/%d/%Y'), ct_latestDate=datetime.strftime(ct_latestDate, '%Y-%m-%d %H:%M:%S'))
+    createOutput(outputPath())
+    backfill(fetcher, startDate, endDate, ct_cache) #...the rest get curtailment placeholders...
+    getLedger().set(ct_latestDate=datetime.strftime(endDate, '%Y-%m-%d %H:%M:%S'))
+    fillMissingCurtail(ct_cache) #...which are then filled in one pass
+    seconds = time.perf_counter() - start
+    fetcher.close()
+    server.shutdown()
+    peakMB = None
+    if sys.platform!='win32':
+        import resource
+        peakMB = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform=='darwin' else 1024) #bytes on macOS, KiB elsewhere
+    Path(resultFile).write_text(json.dumps({'days': days, 'seconds': seconds, 'daysPerSecond': days / seconds, 'peakMB': peakMB, 'stages': stageTimes}))
+
+def copyData(latestDate_dt, ct_cache, src=downloads, outFile=None): #parse the downloaded CSVs into one typed day record, check it and append it to the output
+    outFile = outFile or outputPath()
+    with outputLock(outFile): #other processes may be committing days to the same output
+        return _copyData(latestDate_dt, ct_cache, src, outFile)
+
+def _copyData(latestDate_dt, ct_cache, src, outFile):
+    start = time.time()
+    day = latestDate_dt + timedelta(days=1)
+    downloadedDate = datetime.strftime(day, '%m/%d/%Y') #set date for downloaded data
+    mainOutput = Path(outFile).resolve()==outputPath().resolve() #only the main output tracks curtailment placeholders
+    try:
+        with stage('parse'):
+            values, slots = readDay(matchSeries(src))
+    except ValueError as e: #missing, duplicate or unrecognized files or rows: keep the day out rather than stop the backfill
+        report = {'date': datetime.strftime(day, '%Y-%m-%d'), 'issues': {'unparseable': str(e)}, 'quarantined': True}
+        os.makedirs(qualityDir, exist_ok=True)
+        with open(qualityDir / (report['date']+'.json'), 'w') as f:
+            json.dump(report, f, indent=1)
+        print('  DATA QUALITY ISSUES DETECTED:\n  > unparseable: '+str(e))
+    else:
+        with stage('quality'):
+            report = dataQuality(values, slots, day)
+    provisional = getLedger().get('provisional', []) if mainOutput else []
+    state = {'provisional': [d for d in provisional if d!=report['date']]} if report['date'] in provisional else {}
+    if report['quarantined']: #keep the raw files and the report for inspection instead of appending the day
+        dest = quarantine / datetime.strftime(day, '%Y%m%d')
+        shutil.rmtree(dest, ignore_errors=True)
+        shutil.copytree(src, dest)
+        with open(dest / 'quality.json', 'w') as f:
+            json.dump(report, f, indent=1)
+        print('  Data for '+downloadedDate+' quarantined in '+str(dest))
+        if state: #the live rows of the day must not stay in place of the final data
+            with stage('write'):
+                dropDay(day, outFile)
+            print('  Provisional rows for '+downloadedDate+' removed from the output and rollups.')
+        getLedger().finish(outFile, day, 'quarantined', seconds=time.time() - start, error=', '.join(report['issues']), state=state)
+        count('daysQuarantined')
+        logMetrics('day', date=report['date'], status='quarantined', seconds=time.time() - start, issues=sorted(report['issues']))
+        writePrometheus()
+        return report
+    with stage('parse'):
+        df_merged = assembleDay(values, day)
+    #curtailment data
+    placeholder = False
+    ct_latestDate = getLedger().get('ct_latestDate')
+    ct_latestDate_dt = datetime.strptime(ct_latestDate, '%Y-%m-%d %H:%M:%S')
+    if ct_latestDate_dt > latestDate_dt: #if the curtailment file contains curtailment data for the date of the supply/emissions data just downloaded
+        with stage('curtailment'):
+            values = ct_cache.lookup(np.full(len(df_merged), np.datetime64(day, 'D')), df_merged['hour'].to_numpy(), df_merged['interval'].to_numpy()) #one day's slice of the cache, no merge
+            df_merged['wind_curtail_MW'] = values[:, 0]
+            df_merged['solar_curtail_MW'] = values[:, 1]
+        print('  Curtailment data added...')
+    else:
+        placeholder = True #parseDay leaves the curtailment columns empty
+        print('  Curtailment data not yet available, creating placeholders...')
+    if mainOutput and placeholder and storeFormat=='csv':
+        pending, offset = pendingCurtail()
+        if offset is None and pending is not None: #first placeholder day: note where its rows start
+            state['pendingOffset'] = os.stat(outFile).st_size
+    with stage('write'):
+        appendData(df_merged, outFile)
+    if mainOutput:
+        with stage('rollup'):
+            updateRollups(df_merged)
+    if state.get('pendingOffset')==0: #the header was written first
+        with open(outFile, 'rb') as f:
+            state['pendingOffset'] = len(f.readline())
+    getLedger().finish(outFile, day, 'committed', rows=len(df_merged), seconds=time.time() - start, curtailPending=placeholder, state=state)
+    count('daysCommitted')
+    count('rowsWritten', len(df_merged))
+    count('qualityIssues', len(report['issues']))
+    logMetrics('day', date=report['date'], status='committed', seconds=time.time() - start, rows=len(df_merged), issues=sorted(report['issues']), curtailPending=placeholder)
+    writePrometheus()
+    return report
+
+def legacyMain(argv=None): #the original single-script command line, still used by CAISO_operations.py and by --benchmark
+    global storeFormat, headless, profileMode
+    parser = argparse.ArgumentParser(description='Compile CAISO system-wide demand, supply, and emissions data into a csv file')
+    parser.add_argument('--backfill', nargs=2, metavar=('START', 'END'), help='re-ingest the dates START to END (MM/DD/YYYY) into --output')
+    parser.add_argument('--reprocess', nargs=2, metavar=('START', 'END'), help='rebuild the dates START to END (MM/DD/YYYY) of --output from the raw cache, without downloading')
+    parser.add_argument('--output', default=None, help='output written by --backfill or --reprocess (defaults to the main output)')
+    parser.add_argument('--format', choices=['parquet', 'csv', 'mmap'], default=storeFormat, help='storage format of the output')
+    parser.add_argument('--import-csv', action='store_true', help='carry the CSV data file over to the Parquet or memory-mapped output and exit (done automatically on the first run without one)')
+    parser.add_argument('--export-csv', metavar='PATH', help='write the Parquet store out as a CSV file and exit')
+    parser.add_argument('--benchmark-parse', nargs=2, metavar=('DIR', 'DATE'), help='time the day parser on the files in DIR for DATE (MM/DD/YYYY) and exit')
+    parser.add_argument('--live', action='store_true', help='keep the output current to the latest 5-minute interval until interrupted (HTTP backend, parquet or mmap format)')
+    parser.add_argument('--query', nargs=2, metavar=('START', 'END'), help='print the data from START to END (MM/DD/YYYY) as CSV and exit')
+    parser.add_argument('--freq', choices=['5min', 'hour', 'day', 'month'], default='day', help='resolution of --query: the 5-minute data or a rollup (default: day)')
+    parser.add_argument('--columns', help='comma-separated columns for --query, e.g. solar_MWh,renewable_share,co2_intensity')
+    parser.add_argument('--rebuild-rollups', action='store_true', help='recompute the hourly, daily and monthly rollups from the main output and exit')
+    parser.add_argument('--benchmark', metavar='FIXTURES', help='time every ingest stage on 1 day, 1 month and 3 years replayed from FIXTURES and compare with the saved baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='with --benchmark, save the results as the new baseline')
+    parser.add_argument('--record-fixtures', nargs=3, metavar=('DIR', 'START', 'END'), help='save the CAISO files for START to END (MM/DD/YYYY) and the curtailment workbook in DIR for --benchmark')
+    parser.add_argument('--benchmark-run', nargs=3, help=argparse.SUPPRESS) #one benchmark size, run by --benchmark in a fresh process
+    parser.add_argument('--backend', choices=['http', 'selenium'], default=fetchBackend)
+    parser.add_argument('--workers', type=int, default=workers, help='number of days fetched at the same time')
+    parser.add_argument('--pool', choices=['thread', 'asyncio'], default=poolMode)
+    parser.add_argument('--profile', choices=['cpu', 'memory'], help='profile each day with cProfile or tracemalloc into outputs/profiles')
+    parser.add_argument('--show-browser', action='store_true', help='run the selenium backend with visible Chrome windows')
+    args = parser.parse_args(argv)
+    storeFormat = args.format
+    headless = not args.show_browser
+    profileMode = args.profile
+    if args.live:
+        live()
+    elif args.query:
+        df = query(datetime.strptime(args.query[0], '%m/%d/%Y'), datetime.strptime(args.query[1], '%m/%d/%Y'),
+            args.columns.split(',') if args.columns else None, None if args.freq=='5min' else args.freq)
+        df.to_csv(sys.stdout, index=False)
+    elif args.rebuild_rollups:
+        rebuildRollups()
+    elif args.benchmark:
+        benchmark(args.benchmark, save=args.save_baseline)
+    elif args.benchmark_run:
+        benchmarkRun(args.benchmark_run[0], int(args.benchmark_run[1]), args.benchmark_run[2])
+    elif args.record_fixtures:
+        recordFixtures(*args.record_fixtures)
+    elif args.benchmark_parse:
+        benchmarkParse(args.benchmark_parse[0], datetime.strptime(args.benchmark_parse[1], '%m/%d/%Y'))
+    elif args.import_csv:
+        importCSV()
+    elif args.export_csv:
+        exportCSV(args.export_csv)
+    elif args.reprocess:
+        reprocess(args.reprocess[0], args.reprocess[1], args.output)
+    elif args.backfill:
+        runBackfill(args.backfill[0], args.backfill[1], args.output, args.backend, args.workers, args.pool)
+    else:
+        main(args.backend, args.workers, args.pool)
+
+if __name__== "__main__":
+    legacyMain()
+
+#%%